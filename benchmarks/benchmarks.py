@@ -0,0 +1,230 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import project
+from fetch_scheduler.fetch_scheduler import override_buckets
+from temp_analysis.temp_analysis import run_full_analysis
+
+# Benchmark scenarios as (number of farms, number of days)
+SCENARIOS = {
+    "1-month": (1, 31),
+    "1-year": (1, 365),
+    "10-years": (1, 3653),
+    "1000-farms": (1000, 365),
+}
+
+# Stages of the pipeline that are timed, in the order they run
+STAGES = ["get_weather_data", "precipitation_data_avg", "precipitation_quick_stats", "run_full_analysis"]
+
+BENCHMARK_START_DATE = "2015-01-01"
+
+class _Variable:
+    def __init__(self, values):
+        self.values = values
+
+    def ValuesAsNumpy(self):
+        return self.values
+
+class _Daily:
+    def __init__(self, start, days, variables):
+        self.start = start
+        self.days = days
+        self.variables = variables
+
+    def Time(self):
+        return self.start
+
+    def TimeEnd(self):
+        return self.start + 86400 * self.days
+
+    def Interval(self):
+        return 86400
+
+    def Variables(self, index):
+        return _Variable(self.variables[index])
+
+class SyntheticResponse:
+    def __init__(self, start_date, days, seed=0):
+        """
+        Initialize a daily Open-Meteo response with the same interface as the API's,
+        filled with seasonal temperatures and mostly dry days of rain.
+        """
+        rng = np.random.default_rng(seed)
+        start = pd.Timestamp(start_date, tz="UTC")
+        day_of_year = (start.dayofyear + np.arange(days)) % 365
+        season = np.sin(2 * np.pi * (day_of_year - 110) / 365)
+        temperature_max = 22 + 9 * season + rng.normal(0, 3, days)
+        temperature_min = temperature_max - 9 - rng.gamma(2, 1.5, days)
+        precipitation = np.where(rng.random(days) < 0.3, rng.gamma(0.8, 6, days), 0.0)
+        variables = [temperature_max, temperature_min, precipitation]
+        self.daily = _Daily(int(start.timestamp()), days,
+                            [np.round(values, 1).astype(np.float32) for values in variables])
+
+    def Daily(self):
+        return self.daily
+
+class SyntheticClient:
+    def __init__(self, session=None):
+        """
+        Initialize a stand-in for openmeteo_requests.Client that answers without the network.
+        """
+        self.session = session
+
+    def weather_api(self, url, params):
+        """
+        Return one synthetic response per requested location, like the real client.
+        """
+        latitudes = str(params["latitude"]).split(",")
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [SyntheticResponse(params["start_date"], days, seed=index) for index in range(len(latitudes))]
+
+def synthetic_farms(num_farms, start_date, end_date):
+    """
+    Return `num_farms` farms spread over mainland Portugal, all with the same date range.
+    """
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "farm_id": [f"farm-{index}" for index in range(num_farms)],
+        "latitude": np.round(rng.uniform(37.0, 42.0, num_farms), 4),
+        "longitude": np.round(rng.uniform(-9.4, -6.3, num_farms), 4),
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+    })
+
+def measure(func, repeat=3):
+    """
+    Call `func` `repeat` times and once more under tracemalloc.
+    Returns the median and best time in seconds, the peak memory in bytes and the result.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+
+    # Memory is measured in its own run, since tracing slows every allocation down
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), min(times), peak_memory, result
+
+def _per_farm(func, data):
+    # Single-farm data is analyzed directly; multi-farm data one farm at a time
+    if "FarmId" not in data.columns:
+        return func(data)
+    return [func(farm_data.drop(columns="FarmId")) for _, farm_data in data.groupby("FarmId", sort=False)]
+
+def benchmark_scenario(name, num_farms, days, repeat=3):
+    """
+    Run every stage of the pipeline on synthetic data for one scenario.
+    Returns one result dictionary per stage.
+    """
+    start_date = pd.Timestamp(BENCHMARK_START_DATE).date()
+    end_date = start_date + pd.Timedelta(days=days - 1)
+    if num_farms == 1:
+        inputs = {"latitude": 39.4, "longitude": -8.2, "start_date": start_date, "end_date": end_date}
+        fetch = lambda: project.weatherData(inputs).get_weather_data()
+    else:
+        farms = synthetic_farms(num_farms, start_date, end_date)
+        fetch = lambda: project.batchWeatherData(farms).get_weather_data()
+
+    results = []
+    # Synthetic responses need no rate limit, which would otherwise dominate the timings
+    with patch("project.openmeteo_requests.Client", SyntheticClient), patch("project.get_session", lambda: None), \
+            override_buckets({"open-meteo": None}), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Each stage is timed on the output of the one before, as in main()
+        weather_df = None
+        precipitation_df = None
+        for stage in STAGES:
+            if stage == "get_weather_data":
+                func = fetch
+            elif stage == "precipitation_data_avg":
+                func = lambda: _per_farm(project.precipitation_data_avg, weather_df)
+            elif stage == "precipitation_quick_stats":
+                func = lambda: _per_farm(project.precipitation_quick_stats, precipitation_df)
+            else:
+                func = lambda: _per_farm(run_full_analysis, weather_df)
+
+            seconds, best_seconds, peak_memory, result = measure(func, repeat)
+            if stage == "get_weather_data":
+                weather_df = result
+            elif stage == "precipitation_data_avg":
+                precipitation_df = result if num_farms == 1 else pd.concat(
+                    [farm_data.assign(FarmId=farm_id) for farm_id, farm_data in zip(farms["farm_id"], result)])
+            results.append({
+                "scenario": name,
+                "farms": num_farms,
+                "days": days,
+                "stage": stage,
+                "seconds": seconds,
+                "best_seconds": best_seconds,
+                "peak_memory_mb": peak_memory / 2**20,
+            })
+    return results
+
+def run_benchmarks(scenarios=None, repeat=3):
+    """
+    Run the benchmark scenarios and return the results with details of the environment.
+    `scenarios` maps a name to (number of farms, number of days) and defaults to SCENARIOS.
+    """
+    if scenarios is None:
+        scenarios = SCENARIOS
+    results = []
+    for name, (num_farms, days) in scenarios.items():
+        results.extend(benchmark_scenario(name, num_farms, days, repeat))
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare_results(baseline, current):
+    """
+    Compare two benchmark runs stage by stage.
+    Returns a DataFrame with the times of both runs and their ratio (above 1 is slower).
+    """
+    keys = ["scenario", "stage"]
+    baseline_df = pd.DataFrame(baseline["results"])[keys + ["seconds", "peak_memory_mb"]]
+    current_df = pd.DataFrame(current["results"])[keys + ["seconds", "peak_memory_mb"]]
+    comparison = baseline_df.merge(current_df, on=keys, suffixes=("_baseline", ""))
+    comparison["ratio"] = comparison["seconds"] / comparison["seconds_baseline"]
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the weather pipeline on synthetic Open-Meteo responses.")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help="Scenarios to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the median is reported")
+    parser.add_argument("--compare", help="Earlier results file to compare this run against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks({name: SCENARIOS[name] for name in args.scenarios}, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    summary = pd.DataFrame(report["results"])[["scenario", "stage", "seconds", "peak_memory_mb"]]
+    print(summary.to_string(index=False))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(compare_results(baseline, report).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
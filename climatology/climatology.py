@@ -0,0 +1,160 @@
+import os
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import project
+from temp_analysis.temp_analysis import detect_extreme_events
+
+# 30-year reference period of the current WMO climatological standard normals
+REFERENCE_PERIOD = ("1991-01-01", "2020-12-31")
+
+# The historical forecast API only goes back a few years, so the reference
+# period is downloaded from Open-Meteo's reanalysis archive instead
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+# Percentiles kept for every day of the year
+PERCENTILES = (10, 50, 90)
+
+# Each day's normals pool the days around it in every reference year, so 30 years
+# give 450 values per day instead of 30
+DAY_WINDOW = 15
+
+NORMAL_VARIABLES = ["TemperatureMax", "TemperatureMin", "Precipitation"]
+
+def day_of_year(dates):
+    """
+    Return the day of the year (1-366) of each date on a leap-year calendar,
+    so 1 March is always day 61 and 29 February keeps its own day.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return (dates.dayofyear + ((~dates.is_leap_year) & (dates.month > 2))).to_numpy()
+
+def compute_normals(data, percentiles=PERCENTILES, window=DAY_WINDOW):
+    """
+    Compute day-of-year normals from a daily weather dataframe covering the reference period.
+    Returns a dataframe indexed by DayOfYear (1-366) with a <Variable>_mean column and
+    one <Variable>_p<percentile> column per percentile for each weather variable.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(data['Date']))
+    years = (dates.year - dates.year.min()).to_numpy()
+    days = day_of_year(dates) - 1
+    # Every day with the days around it, wrapping around the new year
+    pooled_days = (np.arange(366)[:, None] + np.arange(window) - window // 2) % 366
+
+    normals = {}
+    for column in NORMAL_VARIABLES:
+        by_year = np.full((years.max() + 1, 366), np.nan)
+        by_year[years, days] = data[column].to_numpy(dtype=np.float64)
+        pooled = by_year[:, pooled_days].transpose(1, 0, 2).reshape(366, -1)
+        normals[f"{column}_mean"] = np.nanmean(pooled, axis=1)
+        for percentile, values in zip(percentiles, np.nanpercentile(pooled, percentiles, axis=1)):
+            normals[f"{column}_p{percentile}"] = values
+    return pd.DataFrame(normals, index=pd.RangeIndex(1, 367, name="DayOfYear"))
+
+def fetch_reference_data(latitude, longitude, reference_period=REFERENCE_PERIOD):
+    """
+    Download the daily weather of the reference period from the reanalysis archive.
+    The period is fetched in parallel year-sized chunks like any long range.
+    """
+    start_date, end_date = reference_period
+    weather = project.weatherData({"latitude": latitude, "longitude": longitude,
+                                   "start_date": start_date, "end_date": end_date}, fast_decode=True)
+    weather.url = ARCHIVE_URL
+    return weather.get_weather_data()
+
+class NormalsCache:
+    def __init__(self, root=".climatology", precision=2):
+        """
+        Initialize an on-disk cache of normals, one Parquet file per grid cell
+        (coordinates rounded to `precision` decimals), reference period and settings.
+        """
+        self.root = Path(root)
+        self.precision = precision
+
+    def path(self, latitude, longitude, reference_period=REFERENCE_PERIOD, percentiles=PERCENTILES, window=DAY_WINDOW):
+        cell = f"{latitude:.{self.precision}f}_{longitude:.{self.precision}f}"
+        start_date, end_date = reference_period
+        settings = f"w{window}_p{'-'.join(str(percentile) for percentile in percentiles)}"
+        return self.root / f"cell={cell}" / f"{start_date}_{end_date}_{settings}.parquet"
+
+    def get(self, latitude, longitude, reference_period=REFERENCE_PERIOD, percentiles=PERCENTILES,
+            window=DAY_WINDOW, fetch=fetch_reference_data):
+        """
+        Return the normals for a location, computing them from `fetch(latitude,
+        longitude, reference_period)` and saving them the first time they are needed.
+        """
+        path = self.path(latitude, longitude, reference_period, percentiles, window)
+        if path.exists():
+            return pd.read_parquet(path)
+
+        normals = compute_normals(fetch(latitude, longitude, reference_period), percentiles, window)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file named per process first, so an interrupted or concurrent
+        # write never leaves a broken file
+        temporary_path = path.parent / f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        normals.to_parquet(temporary_path)
+        os.replace(temporary_path, path)
+        return normals
+
+def _normals_for_dates(normals, column, dates):
+    # Look up one normals column for every date by position, without a merge
+    return normals[column].to_numpy()[day_of_year(dates) - 1]
+
+def compute_anomalies(data, normals):
+    """
+    Compare a daily weather dataframe with the normals.
+    Returns a new dataframe with <Variable>_normal (the day's mean) and
+    <Variable>_anomaly (departure from it) columns added.
+    """
+    dates = pd.to_datetime(data['Date'])
+    new_columns = {}
+    for column in NORMAL_VARIABLES:
+        if column in data.columns:
+            normal = _normals_for_dates(normals, f"{column}_mean", dates)
+            new_columns[f"{column}_normal"] = normal
+            new_columns[f"{column}_anomaly"] = data[column].to_numpy(dtype=np.float64) - normal
+    return data.assign(**new_columns)
+
+def detect_percentile_events(data, normals, percentile=None, heat=True, min_duration=3):
+    """
+    Find heatwaves (TemperatureMax above the day's `percentile` normal) or cold
+    spells (TemperatureMin below it) of at least `min_duration` consecutive days.
+    `percentile` defaults to 90 for heatwaves and 10 for cold spells.
+    The data should have one row per day. Returns Start, End, Length and PeakExcess,
+    the largest departure from the day's percentile during the episode.
+    """
+    if percentile is None:
+        percentile = 90 if heat else 10
+    column = 'TemperatureMax' if heat else 'TemperatureMin'
+    dates = pd.to_datetime(data['Date'])
+    excess = data[column].to_numpy(dtype=np.float64) - _normals_for_dates(normals, f"{column}_p{percentile}", dates)
+    events = detect_extreme_events(excess, 0, heat, min_duration, dates.to_numpy())
+    return events.drop(columns='FarmId').rename(columns={'Peak': 'PeakExcess'})
+
+def departure_report(data, normals, high_percentile=90, low_percentile=10):
+    """
+    Summarize how each month departed from normal: mean temperatures against their
+    normals, precipitation against the normal total, and the number of days with
+    TemperatureMax above the high percentile and TemperatureMin below the low one.
+    """
+    anomalies = compute_anomalies(data, normals)
+    dates = pd.to_datetime(data['Date'])
+    anomalies = anomalies.assign(
+        Month=dates.dt.strftime('%Y-%m').to_numpy(),
+        HotDays=data['TemperatureMax'].to_numpy() > _normals_for_dates(normals, f"TemperatureMax_p{high_percentile}", dates),
+        ColdNights=data['TemperatureMin'].to_numpy() < _normals_for_dates(normals, f"TemperatureMin_p{low_percentile}", dates),
+    )
+    report = anomalies.groupby('Month').agg(
+        TemperatureMax=('TemperatureMax', 'mean'),
+        TemperatureMax_normal=('TemperatureMax_normal', 'mean'),
+        TemperatureMax_anomaly=('TemperatureMax_anomaly', 'mean'),
+        TemperatureMin=('TemperatureMin', 'mean'),
+        TemperatureMin_normal=('TemperatureMin_normal', 'mean'),
+        TemperatureMin_anomaly=('TemperatureMin_anomaly', 'mean'),
+        Precipitation=('Precipitation', 'sum'),
+        Precipitation_normal=('Precipitation_normal', 'sum'),
+        HotDays=('HotDays', 'sum'),
+        ColdNights=('ColdNights', 'sum'),
+    )
+    return report.reset_index()
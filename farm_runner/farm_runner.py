@@ -0,0 +1,106 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import pandas as pd
+import project
+from fetch_scheduler.fetch_scheduler import OPEN_METEO_RATE, TokenBucket, override_buckets, set_bucket
+from hourly_weather.hourly_weather import HOURLY_AGGREGATIONS
+from weather_store.weather_store import WeatherStore
+from weather_export.weather_export import export_frame
+
+# Give the worker process its share of Open-Meteo's rate limit. Every request the
+# farms of this worker send, chunks and hourly requests included, takes a token from it
+def _init_worker(rate):
+    set_bucket("open-meteo", TokenBucket(rate))
+
+def run_farm(farm, output_dir, hourly_variables=None, store_dir=".weather_store", verbose=False, format="csv"):
+    """
+    Fetch, analyze and export the weather of one farm into <output_dir>/<farm_id>.
+    Returns (farm_id, None) on success or (farm_id, error message) on failure,
+    so one failing farm does not stop the run.
+    """
+    farm_id = farm["farm_id"]
+    try:
+        farm_dir = Path(output_dir) / str(farm_id)
+        # Keep the printed analysis output of every farm out of the job log
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+            weather = project.weatherData(farm, store=WeatherStore(store_dir))
+            project.weatherPipeline(weather).export_all(farm_dir, format)
+            if hourly_variables:
+                aggregations = {variable: HOURLY_AGGREGATIONS.get(variable, ["mean", "min", "max"])
+                                for variable in hourly_variables}
+                daily, weekly = weather.get_hourly_aggregates(aggregations)
+                export_frame(daily, farm_dir / "hourly_daily_aggregates", format)
+                export_frame(weekly, farm_dir / "hourly_weekly_aggregates", format)
+        return farm_id, None
+    except Exception as e:
+        return farm_id, str(e)
+
+def load_farms(path, start_date, end_date=None):
+    """
+    Read a CSV of farms with farm_id, latitude and longitude columns.
+    Optional start_date and end_date columns override the run's date range per farm.
+    """
+    farms = pd.read_csv(path)
+    if "start_date" not in farms.columns:
+        farms["start_date"] = start_date
+    if "end_date" not in farms.columns:
+        farms["end_date"] = end_date
+    farms["start_date"] = farms["start_date"].fillna(start_date)
+    farms = farms.astype(object).where(farms.notna(), None)
+    return farms.to_dict("records")
+
+def run_farms(farms, output_dir, hourly_variables=None, workers=4, store_dir=".weather_store", verbose=False, format="csv"):
+    """
+    Run every farm across a pool of worker processes and return the failures as
+    a {farm_id: error} dict. With workers=1 the farms run in this process.
+    Open-Meteo's rate limit is split evenly between the workers.
+    """
+    failures = {}
+    if workers == 1:
+        # Only for this run, so the caller's own buckets are back in place afterwards
+        with override_buckets({"open-meteo": TokenBucket(OPEN_METEO_RATE)}):
+            for farm in farms:
+                farm_id, error = run_farm(farm, output_dir, hourly_variables, store_dir, verbose, format)
+                if error is not None:
+                    failures[farm_id] = error
+        return failures
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(OPEN_METEO_RATE / workers,)) as pool:
+        futures = [pool.submit(run_farm, farm, output_dir, hourly_variables, store_dir, verbose, format) for farm in farms]
+        for future in as_completed(futures):
+            farm_id, error = future.result()
+            if error is not None:
+                failures[farm_id] = error
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch, analyze and export weather data for many farms without prompts")
+    parser.add_argument("--farms", required=True, help="CSV file with farm_id, latitude and longitude columns")
+    parser.add_argument("--start-date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end-date", default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--format", choices=["csv", "parquet", "feather"], default="csv")
+    parser.add_argument("--hourly", nargs="*", default=None, metavar="VARIABLE",
+                        help="hourly Open-Meteo variables to fetch and reduce to daily and weekly aggregates")
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--store-dir", default=".weather_store")
+    parser.add_argument("--verbose", action="store_true", help="show the analysis output of every farm")
+    args = parser.parse_args(argv)
+
+    farms = load_farms(args.farms, args.start_date, args.end_date)
+    started = time.perf_counter()
+    failures = run_farms(farms, args.output_dir, args.hourly, args.workers, args.store_dir, args.verbose, args.format)
+    elapsed = time.perf_counter() - started
+
+    print(f"Processed {len(farms)} farms in {elapsed:.1f} s ({len(farms) / elapsed:.2f} farms per second)")
+    for farm_id, error in failures.items():
+        print(f"Farm {farm_id} failed: {error}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Requests per second allowed for each API. Open-Meteo's free tier allows 600 calls
+# per minute; geoapi.pt does not publish a quota, so we stay conservative there.
+OPEN_METEO_RATE = 10
+GEOAPI_RATE = 1
+RATE_LIMITS = {"open-meteo": OPEN_METEO_RATE, "geoapi": GEOAPI_RATE}
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Initialize a token bucket that refills at `rate` tokens per second.
+        `capacity` is the largest burst allowed and defaults to one second of tokens.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, blocking until one is available.
+        """
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            # Sleep outside the lock so other threads can refill and check the bucket
+            self.sleep(wait)
+
+# Token buckets shared by every request in this process, created on first use.
+# A bucket set to None turns that rate limit off.
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(name):
+    """
+    Return the process-wide TokenBucket for an API in RATE_LIMITS.
+    """
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(RATE_LIMITS[name])
+        return _buckets[name]
+
+def set_bucket(name, bucket):
+    """
+    Replace the process-wide bucket for an API and return the previous one.
+    """
+    with _buckets_lock:
+        previous = _buckets.get(name)
+        _buckets[name] = bucket
+        return previous
+
+def acquire(name):
+    """
+    Take one token from the process-wide bucket for an API, blocking until one is available.
+    Call it once per request sent, however the requests are scheduled.
+    """
+    bucket = get_bucket(name)
+    if bucket is not None:
+        bucket.acquire()
+
+@contextmanager
+def override_buckets(buckets):
+    """
+    Use `buckets` ({name: TokenBucket or None}) as the process-wide buckets inside the block,
+    for example to lift the limits when talking to a local stand-in server.
+    """
+    previous = {name: set_bucket(name, bucket) for name, bucket in buckets.items()}
+    try:
+        yield
+    finally:
+        for name, bucket in previous.items():
+            set_bucket(name, bucket)
+
+class FetchScheduler:
+    def __init__(self, max_workers=8, rate_limits=None):
+        """
+        Initialize the scheduler with a concurrency cap and per-API rate limits.
+        By default tasks draw from the process-wide buckets, so every scheduler
+        together stays within the API quotas. `rate_limits` maps a limit name to
+        requests per second to give this scheduler its own buckets instead.
+        """
+        self.max_workers = max_workers
+        if rate_limits is None:
+            self.buckets = None
+        else:
+            self.buckets = {name: TokenBucket(rate) for name, rate in rate_limits.items()}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, func, *args, limit=None, **kwargs):
+        """
+        Run `func(*args, **kwargs)` on the pool and return its Future.
+        When `limit` names a rate limit, a token is taken before the call is made.
+        A limit missing from a scheduler's own `rate_limits` is not rate limited.
+        """
+        if limit is None:
+            bucket = None
+        elif self.buckets is None:
+            bucket = get_bucket(limit)
+        else:
+            bucket = self.buckets.get(limit)
+
+        def task():
+            if bucket is not None:
+                bucket.acquire()
+            return func(*args, **kwargs)
+
+        return self.executor.submit(task)
+
+    def map(self, func, items, limit=None):
+        """
+        Call `func` on every item concurrently and return the results in input order.
+        """
+        futures = [self.submit(func, item, limit=limit) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """
+        Wait for running tasks and release the worker threads.
+        """
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,204 @@
+import json
+from pathlib import Path
+import numpy as np
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Largest edges x points block tested at once by OfflineResolver
+MAX_EDGE_POINT_PAIRS = 1_000_000
+
+# Fields of a geoapi.pt answer that describe an area rather than the exact point
+AREA_FIELDS = ["distrito", "concelho", "freguesia"]
+
+def geohash(latitude, longitude, precision):
+    """
+    Encode coordinates as a geohash string with `precision` characters.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        value_range, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+class GeocodeIndex:
+    def __init__(self, min_precision=6, max_precision=8, min_points=3):
+        """
+        Initialize an adaptive geohash index of resolved concelho/freguesia answers.
+        Every answer is recorded in its cells from `min_precision` (about 1.2 x 0.6 km)
+        down to `max_precision` (about 38 x 19 m). A point is answered from its finest
+        cell, or from a coarser cell once `min_points` points in it have agreed, so one
+        answer never speaks for a whole cell. A cell where answers disagree is split and
+        only its finer cells are used from then on.
+        """
+        self.min_precision = min_precision
+        self.max_precision = max_precision
+        self.min_points = min_points
+        # geohash -> {"answer": ..., "latitude": ..., "longitude": ..., "points": ...},
+        # or None when the cell is split because it holds more than one answer
+        self.cells = {}
+
+    def lookup(self, latitude, longitude):
+        """
+        Return the known area answer for a point, or None if it has to be geocoded.
+        """
+        for precision in range(self.min_precision, self.max_precision + 1):
+            key = geohash(latitude, longitude, precision)
+            if key not in self.cells:
+                return None
+            entry = self.cells[key]
+            if entry is None:
+                continue
+            # Indexes saved before points were counted hold one point per cell
+            if precision == self.max_precision or entry.get("points", 1) >= self.min_points:
+                return entry["answer"]
+        return None
+
+    def add(self, latitude, longitude, answer):
+        """
+        Record the area answer for a point resolved by the API.
+        """
+        answer = {field: answer.get(field) for field in AREA_FIELDS}
+        for precision in range(self.min_precision, self.max_precision + 1):
+            key = geohash(latitude, longitude, precision)
+            existing = self.cells.get(key, False)
+            if existing is False:
+                self.cells[key] = {"answer": answer, "latitude": latitude, "longitude": longitude, "points": 1}
+            elif existing is None:
+                continue
+            elif existing["answer"] == answer:
+                existing["points"] = existing.get("points", 1) + 1
+            else:
+                # Conflicting answers: split the cell. Both points are already in its finer cells
+                self.cells[key] = None
+
+    def save(self, path):
+        """
+        Write the index to a JSON file.
+        """
+        Path(path).write_text(json.dumps({
+            "min_precision": self.min_precision,
+            "max_precision": self.max_precision,
+            "min_points": self.min_points,
+            "cells": self.cells,
+        }))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save(), or return an empty index if the file does not exist.
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        data = json.loads(path.read_text())
+        index = cls(data["min_precision"], data["max_precision"], data.get("min_points", 3))
+        index.cells = data["cells"]
+        return index
+
+class OfflineResolver:
+    def __init__(self, path, field_map=None, grid_size=0.05):
+        """
+        Load municipality/freguesia boundary polygons from a GeoJSON file in
+        longitude/latitude (EPSG:4326) and build a uniform grid index over them.
+        `field_map` maps our area fields to the property names used in the file.
+        """
+        if field_map is None:
+            field_map = {"distrito": "Distrito", "concelho": "Concelho", "freguesia": "Freguesia"}
+        self.grid_size = grid_size
+        features = json.loads(Path(path).read_text(encoding="utf-8"))["features"]
+
+        self.answers = []
+        self.rings = []
+        bounds = []
+        for feature in features:
+            properties = {key.lower(): value for key, value in feature["properties"].items()}
+            self.answers.append({field: properties.get(name.lower()) for field, name in field_map.items()})
+            geometry = feature["geometry"]
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+            # Outer rings and holes of every part are tested together with the even-odd rule
+            rings = [np.asarray(ring, dtype=np.float64) for polygon in polygons for ring in polygon]
+            self.rings.append(rings)
+            all_points = np.concatenate(rings)
+            bounds.append((all_points[:, 0].min(), all_points[:, 1].min(), all_points[:, 0].max(), all_points[:, 1].max()))
+        self.bounds = np.asarray(bounds)
+
+        # Register every polygon in the grid cells its bounding box touches
+        self.origin = self.bounds[:, :2].min(axis=0)
+        self.grid = {}
+        cell_min = np.floor((self.bounds[:, :2] - self.origin) / grid_size).astype(int)
+        cell_max = np.floor((self.bounds[:, 2:] - self.origin) / grid_size).astype(int)
+        for polygon_id, (low, high) in enumerate(zip(cell_min, cell_max)):
+            for cx in range(low[0], high[0] + 1):
+                for cy in range(low[1], high[1] + 1):
+                    self.grid.setdefault((cx, cy), []).append(polygon_id)
+
+    def contains(self, polygon_id, lons, lats):
+        """
+        Return a boolean array of which points fall inside a polygon (ray casting).
+        """
+        inside = np.zeros(len(lons), dtype=bool)
+        for ring in self.rings[polygon_id]:
+            x1, y1 = ring[:, 0][:, None], ring[:, 1][:, None]
+            x2, y2 = np.roll(ring[:, 0], -1)[:, None], np.roll(ring[:, 1], -1)[:, None]
+            # Test points in chunks so the edges x points arrays stay small
+            chunk = max(1, MAX_EDGE_POINT_PAIRS // len(ring))
+            for start in range(0, len(lons), chunk):
+                px, py = lons[start:start + chunk], lats[start:start + chunk]
+                crosses = (y1 > py) != (y2 > py)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    x_cross = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+                inside[start:start + chunk] ^= (crosses & (px < x_cross)).sum(axis=0) % 2 == 1
+        return inside
+
+    def resolve_many(self, latitudes, longitudes):
+        """
+        Return the polygon index for every point, or -1 where no polygon contains it.
+        Points are grouped by grid cell so each is only tested against nearby polygons.
+        """
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        result = np.full(len(lats), -1, dtype=np.int64)
+        cells = np.floor((np.column_stack([lons, lats]) - self.origin) / self.grid_size).astype(int)
+        unique_cells, cell_of_point = np.unique(cells, axis=0, return_inverse=True)
+        cell_of_point = cell_of_point.ravel()
+        order = np.argsort(cell_of_point, kind="stable")
+        splits = np.cumsum(np.bincount(cell_of_point, minlength=len(unique_cells)))[:-1]
+
+        for cell, point_ids in zip(map(tuple, unique_cells), np.split(order, splits)):
+            candidates = self.grid.get(cell, [])
+            for polygon_id in candidates:
+                pending = point_ids[result[point_ids] == -1]
+                if len(pending) == 0:
+                    break
+                west, south, east, north = self.bounds[polygon_id]
+                in_box = pending[(lons[pending] >= west) & (lons[pending] <= east) & (lats[pending] >= south) & (lats[pending] <= north)]
+                if len(in_box):
+                    result[in_box[self.contains(polygon_id, lons[in_box], lats[in_box])]] = polygon_id
+        return result
+
+    def resolve(self, latitude, longitude):
+        """
+        Return the area answer for one point, or None if it is outside every polygon.
+        """
+        polygon_id = self.resolve_many([latitude], [longitude])[0]
+        if polygon_id == -1:
+            return None
+        return dict(self.answers[polygon_id])
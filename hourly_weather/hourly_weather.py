@@ -0,0 +1,63 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# Hourly variables requested by default and how each one is reduced to daily values
+HOURLY_AGGREGATIONS = {
+    "temperature_2m": ["mean", "min", "max"],
+    "relative_humidity_2m": ["mean", "min", "max"],
+    "soil_moisture_0_to_1cm": ["mean"],
+    "et0_fao_evapotranspiration": ["sum"],
+}
+
+_REDUCERS = {
+    "mean": np.nanmean,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "sum": np.nansum,
+}
+
+def aggregate_hourly_response(response, aggregations=HOURLY_AGGREGATIONS):
+    """
+    Reduce one hourly Open-Meteo response to one row per day.
+    Columns are named <variable>_<aggregation>, in the order of `aggregations`.
+    """
+    hourly = response.Hourly()
+    start = pd.to_datetime(hourly.Time(), unit="s")
+    steps_per_day = 86400 // hourly.Interval()
+    num_steps = (hourly.TimeEnd() - hourly.Time()) // hourly.Interval()
+    num_days = -(-num_steps // steps_per_day)
+
+    daily_data = {"Date": pd.date_range(start=start, periods=num_days, freq="D")}
+    for index, (variable, variable_aggregations) in enumerate(aggregations.items()):
+        values = hourly.Variables(index).ValuesAsNumpy()
+        # Pad a partial last day with NaN so the values can be reshaped into days x hours
+        if len(values) != num_days * steps_per_day:
+            padded = np.full(num_days * steps_per_day, np.nan, dtype=np.float64)
+            padded[:len(values)] = values
+            values = padded
+        by_day = values.reshape(num_days, steps_per_day)
+        empty_days = np.isnan(by_day).all(axis=1)
+
+        with warnings.catch_warnings():
+            # Days with no values at all are expected and become NaN below
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for aggregation in variable_aggregations:
+                reduced = _REDUCERS[aggregation](by_day, axis=1).astype(np.float64)
+                reduced[empty_days] = np.nan
+                daily_data[f"{variable}_{aggregation}"] = reduced
+
+    return pd.DataFrame(daily_data)
+
+def weekly_from_daily(daily):
+    """
+    Reduce daily aggregates to weekly ones (weeks run Monday to Sunday and are
+    labelled by their Sunday). Each column is reduced with its own aggregation,
+    so a weekly sum is the sum of daily sums and a weekly max the max of daily maxes.
+    """
+    column_aggregations = {column: column.rsplit("_", 1)[1] for column in daily.columns if column != "Date"}
+    weeks = daily.resample("W-SUN", on="Date")
+    weekly = weeks.agg(column_aggregations)
+    # A week without any values is NaN rather than a sum of 0
+    weekly = weekly.where(weeks.count()[weekly.columns] > 0)
+    return weekly.reset_index()
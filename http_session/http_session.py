@@ -0,0 +1,61 @@
+import threading
+from datetime import timedelta
+
+# Keep-alive connections kept open per host. This should be at least the
+# FetchScheduler concurrency cap so worker threads never wait for a connection.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+# Municipality boundaries rarely change, so geocoding answers are kept much longer
+URLS_EXPIRE_AFTER = {
+    "json.geoapi.pt/*": timedelta(days=30),
+}
+
+_sessions = {}
+_lock = threading.Lock()
+
+def get_session(cache_name=".cache", expire_after=3600):
+    """
+    Return the process-wide cached session with retries and connection pooling.
+    Every caller asking for the same cache file shares one session, one SQLite
+    cache handle and one pool of keep-alive connections. With cache_name=None the
+    session keeps the retries and pooling but caches nothing, for load tests.
+    """
+    # Imported here so importing this module stays cheap until a session is needed
+    import requests
+    import requests_cache
+    from requests.adapters import HTTPAdapter
+    from retry_requests import retry
+    from run_metrics.run_metrics import track_session
+
+    with _lock:
+        session = _sessions.get(cache_name)
+        if session is None:
+            if cache_name is None:
+                cache_session = requests.Session()
+            else:
+                cache_session = requests_cache.CachedSession(
+                    cache_name, expire_after=expire_after, urls_expire_after=URLS_EXPIRE_AFTER
+                )
+            session = retry(cache_session, retries=5, backoff_factor=0.2)
+
+            # Swap in a larger connection pool that keeps the same retry policy
+            retry_policy = session.get_adapter("https://").max_retries
+            adapter = HTTPAdapter(
+                max_retries=retry_policy, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            # Count cache hits, misses and bytes downloaded for the run being measured
+            track_session(session)
+            _sessions[cache_name] = session
+        return session
+
+def close_sessions():
+    """
+    Close every shared session and its pooled connections.
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
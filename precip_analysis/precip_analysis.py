@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Rolling windows (in days) and statistics computed by default
+ROLLING_WINDOWS = (3, 7, 30, 90)
+ROLLING_STATS = ("mean", "sum", "max")
+
+def farms_by_days(data, column="Precipitation"):
+    """
+    Pivot a long-format frame (FarmId, Date, ...) into a farms x days array.
+    Returns the farm ids, the dates and the float64 array, with NaN for missing days.
+    """
+    table = data.pivot(index="FarmId", columns="Date", values=column)
+    table = table.reindex(columns=sorted(table.columns))
+    return table.index.to_numpy(), pd.to_datetime(table.columns), table.to_numpy(dtype=np.float64)
+
+def _prefix_sums(values):
+    """
+    Cumulative sums of the values and of the count of non-missing values.
+    Both start with a column of zeros, so a window sum is prefix[i + 1] - prefix[i + 1 - window].
+    """
+    valid = ~np.isnan(values)
+    prefix_sum = np.zeros((values.shape[0], values.shape[1] + 1))
+    prefix_count = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(np.where(valid, values, 0.0), axis=1, out=prefix_sum[:, 1:])
+    np.cumsum(valid, axis=1, out=prefix_count[:, 1:])
+    return prefix_sum, prefix_count
+
+def _window_difference(prefix, window):
+    """
+    Trailing window totals from a prefix array, using a partial window for the first days.
+    """
+    lagged = np.maximum(np.arange(1, prefix.shape[1]) - window, 0)
+    return prefix[:, 1:] - prefix[:, lagged]
+
+def _rolling_max(values, window):
+    """
+    Trailing window maximum in O(n) with the van Herk/Gil-Werman block algorithm.
+    """
+    num_farms, num_days = values.shape
+    filled = np.where(np.isnan(values), -np.inf, values)
+    # Pad to whole blocks of `window` days
+    num_blocks = -(-num_days // window)
+    padded = np.full((num_farms, num_blocks * window), -np.inf)
+    padded[:, :num_days] = filled
+    blocks = padded.reshape(num_farms, num_blocks, window)
+
+    # Running max from the start of each block and from the end of each block
+    from_start = np.maximum.accumulate(blocks, axis=2).reshape(num_farms, -1)
+    from_end = np.maximum.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(num_farms, -1)
+
+    result = np.empty((num_farms, num_days))
+    # The first window - 1 days only have a partial window
+    head = min(window - 1, num_days)
+    result[:, :head] = np.maximum.accumulate(filled[:, :head], axis=1)
+    if num_days >= window:
+        ends = np.arange(window - 1, num_days)
+        result[:, window - 1:] = np.maximum(from_end[:, ends - window + 1], from_start[:, ends])
+    result[np.isneginf(result)] = np.nan
+    return result
+
+def rolling_precipitation(values, windows=ROLLING_WINDOWS, stats=ROLLING_STATS):
+    """
+    Compute trailing rolling statistics for every farm and window at once.
+    `values` is a farms x days array. Like `rolling(window, min_periods=1)`,
+    the first days use a partial window and missing values are skipped.
+    Returns a dict mapping (stat, window) to a farms x days array.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    results = {}
+    # The prefix arrays are shared by every window, so each window only costs one subtraction
+    if "mean" in stats or "sum" in stats:
+        prefix_sum, prefix_count = _prefix_sums(values)
+    for window in windows:
+        if "mean" in stats or "sum" in stats:
+            window_sum = _window_difference(prefix_sum, window)
+            window_count = _window_difference(prefix_count, window)
+            no_values = window_count == 0
+            if "mean" in stats:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    results[("mean", window)] = np.where(no_values, np.nan, window_sum / window_count)
+            if "sum" in stats:
+                results[("sum", window)] = np.where(no_values, np.nan, window_sum)
+        if "max" in stats:
+            results[("max", window)] = _rolling_max(values, window)
+    return results
+
+def rolling_precipitation_frame(data, windows=ROLLING_WINDOWS, stats=ROLLING_STATS):
+    """
+    Run rolling_precipitation over a long-format frame (FarmId, Date, Precipitation)
+    and return a long-format frame with one Rolling_<Stat>_<window> column per result.
+    """
+    farm_ids, dates, values = farms_by_days(data)
+    results = rolling_precipitation(values, windows, stats)
+    frame = {
+        "FarmId": np.repeat(farm_ids, len(dates)),
+        "Date": np.tile(dates, len(farm_ids)),
+        "Precipitation": values.ravel(),
+    }
+    for (stat, window), result in results.items():
+        frame[f"Rolling_{stat.capitalize()}_{window}"] = result.ravel()
+    return pd.DataFrame(frame)
@@ -1,35 +1,88 @@
-from datetime import datetime, date
-import pandas as pd
-import openmeteo_requests
-import requests_cache
-import requests
-from retry_requests import retry
-import geocoder 
-import tkinter as tk
-from tkinter import filedialog
+import time
+_import_started = time.perf_counter()
+import argparse
+import importlib
+import sys
+import threading
+from concurrent.futures import as_completed
+from datetime import datetime, date, timedelta
+from functools import cached_property
 from pathlib import Path
-from temp_analysis.temp_analysis import run_full_analysis
-
-def main():
-    print("Welcome to this weather analysis tool. It will help you learn about the weather in your area")
-    farm_data = get_farm_input()  # Get user location and start date for weather analysis
-    location = locationData(farm_data)
-    municipality = location.get_municipality()
-    print(f"It looks like you're located in the municipality of {municipality}. Enjoy these details about the weather in your area:")
-    
-    weather = weatherData(farm_data)  # Fetch weather data
-    daily_weather_df = weather.get_weather_data()  # Get DataFrame of weather data
-    weather.export_weather_data(export=True)  # Optionally export the data
-    
-    # Precipitation data analysis
-    precipitation_data_avg(daily_weather_df)
-    precip_data = precipitation_data_avg(daily_weather_df)
-    precipitation_quick_stats(precip_data)
-    
-    # Temperature data analysis
-    run_full_analysis(daily_weather_df)
+from http_session.http_session import get_session
+
+# Stands in for a module and imports it the first time one of its attributes is used.
+# The import goes through importlib's own per-module locks, so threads that first use
+# a module at the same time all see it fully loaded (importlib.util.LazyLoader does
+# not guarantee this before Python 3.12).
+class lazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+# Import a module the first time one of its attributes is used
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    return lazyModule(name)
+
+# Heavy modules are only loaded when they are first used, so batch workers and the
+# tests don't pay for the ones they never touch. tkinter is imported inside
+# export_weather_data, so headless runs never load the GUI toolkit.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+openmeteo_requests = lazy_import("openmeteo_requests")
+geocoder = lazy_import("geocoder")
+temp_analysis = lazy_import("temp_analysis.temp_analysis")
+fetch_scheduler = lazy_import("fetch_scheduler.fetch_scheduler")
+weather_store = lazy_import("weather_store.weather_store")
+hourly_weather = lazy_import("hourly_weather.hourly_weather")
+weather_export = lazy_import("weather_export.weather_export")
+request_coalescer = lazy_import("request_coalescer.request_coalescer")
+run_metrics = lazy_import("run_metrics.run_metrics")
+
+# Time allowed for importing project.py; run_headless reports the actual time against it
+STARTUP_BUDGET_SECONDS = 0.1
+
+# Each stage of a run is timed, and the timings, cache hits and misses and bytes
+# downloaded are printed at the end. With profile_path, a cProfile and tracemalloc
+# report of the whole run is also written to that file.
+def main(profile_path=None):
+    metrics = run_metrics.RunMetrics()
+    with metrics, run_metrics.profile(profile_path):
+        print("Welcome to this weather analysis tool. It will help you learn about the weather in your area")
+        farm_data = get_farm_input()  # Get user location and start date for weather analysis
+        location = locationData(farm_data)
+        with run_metrics.span("municipality lookup"):
+            municipality = location.get_municipality()
+        print(f"It looks like you're located in the municipality of {municipality}. Enjoy these details about the weather in your area:")
+
+        weather = weatherData(farm_data, store=weather_store.WeatherStore())  # Fetch weather data, reusing days stored locally
+        pipeline = weatherPipeline(weather)  # Weather data and derived products are computed once and shared
+        with run_metrics.span("weather data"):
+            weather_df = pipeline.weather_df
+        weather.export_weather_data(export=True, weather_data=weather_df)  # Optionally export the data
+
+        # Precipitation data analysis (the quick stats are printed when first computed)
+        with run_metrics.span("precipitation analysis"):
+            precipitation_stats = pipeline.precipitation_stats
+
+        # Temperature data analysis
+        with run_metrics.span("temperature analysis"):
+            temp_analysis.run_full_analysis(weather_df)
+
+    print()
+    print(metrics.report())
+    if profile_path is not None:
+        print(f"Profile written to {profile_path}")
 
-import geocoder 
 def get_farm_input():
     """
     Collect and validate GPS coordinates from the user's IP, start date, and end date.
@@ -37,7 +90,8 @@ def get_farm_input():
     """
     # Step 1: Retrieve GPS coordinates using geocoder
     print("Fetching GPS coordinates from your IP address...")
-    g = geocoder.ip('me')
+    with run_metrics.span("geocoder.ip"):
+        g = geocoder.ip('me')
     if g.ok:
         # Extract latitude and longitude if the geocoder is successful
         lat, long = g.latlng
@@ -68,21 +122,37 @@ def get_farm_input():
 
 # Get location data from Geo API
 class locationData:
-    def __init__(self, inputs):
+    def __init__(self, inputs, geocode_index=None, resolver=None, session=None):
         # Initialize instance attributes
         self.latitude = inputs['latitude']
         self.longitude = inputs['longitude']
-        
-        # Set up the GEO API client with caching and retries
-        self.cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-        self.retry_session = retry(self.cache_session, retries=5, backoff_factor=0.2)
+        # Optional GeocodeIndex of areas resolved before, checked before calling the API
+        self.geocode_index = geocode_index
+        # Optional OfflineResolver that answers from local boundary polygons instead of the API
+        self.resolver = resolver
+        # An explicit session replaces the shared one
+        if session is not None:
+            self.session = session
         self.base_url = "https://json.geoapi.pt/gps"
 
+    # Use the shared GEO API session with caching, retries and connection pooling.
+    # It is only opened when a point actually goes to the API
+    @cached_property
+    def session(self):
+        return get_session()
+
     # make api request fpr latitude and longitude
     def get_location_data(self):
+        if self.resolver is not None:
+            result = self.resolver.resolve(self.latitude, self.longitude)
+            if result is None:
+                return "Error: location outside known boundaries"
+            return result
+
         # Make the API request
         url = f"{self.base_url}/{self.latitude},{self.longitude}"
-        response = requests.get(url)
+        with run_metrics.span("geoapi request"):
+            response = self.session.get(url)
         
         if response.status_code == 200:
             return response.json()
@@ -91,82 +161,236 @@ class locationData:
         
     # get freguesia name from json
     def get_municipality(self):
-        result = self.get_location_data()['concelho']
+        if self.geocode_index is not None:
+            known_area = self.geocode_index.lookup(self.latitude, self.longitude)
+            if known_area is not None:
+                return known_area['concelho']
+
+        location_data = self.get_location_data()
+        if self.geocode_index is not None and isinstance(location_data, dict):
+            self.geocode_index.add(self.latitude, self.longitude, location_data)
+        result = location_data['concelho']
         return result
 
+# Daily variables requested from Open-Meteo, in the order they are decoded
+DAILY_VARIABLES = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+
+# Maximum number of locations sent in one multi-location Open-Meteo request
+BATCH_SIZE = 100
+
+# Days of hourly data requested at a time when building hourly aggregates
+HOURLY_CHUNK_DAYS = 31
+
+# Long date ranges are requested in chunks of this many days, a few chunks at a time
+FETCH_CHUNK_DAYS = 366
+FETCH_CHUNK_WORKERS = 4
+
+# Stored days this close to today are downloaded again, since the API may still revise them
+REFRESH_DAYS = 2
+
+# Split a date range into consecutive (start, end) ranges of at most chunk_days days
+def split_date_range(start_date, end_date, chunk_days):
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + pd.Timedelta(days=chunk_days - 1), end)
+        chunks.append((start.date(), chunk_end.date()))
+        start = chunk_end + pd.Timedelta(days=1)
+    return chunks
+
+# Turn one Open-Meteo response into the daily DataFrame.
+# With fast=True the dates stay datetime64 and the values stay the float32 arrays
+# returned by the API, without copies; otherwise the frame is formatted for display.
+def process_daily_response(response, fast=False):
+    # Process daily data
+    daily = response.Daily()
+    daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
+    daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
+    daily_precipitation_sum = daily.Variables(2).ValuesAsNumpy()
+
+    daily_dates = pd.date_range(
+        start = pd.to_datetime(daily.Time(), unit = "s"),
+        end = pd.to_datetime(daily.TimeEnd(), unit = "s"),
+        freq = pd.Timedelta(seconds = daily.Interval()),
+        inclusive = "left"
+    )
+
+    daily_dataframe = pd.DataFrame({
+        'Date': daily_dates,
+        'TemperatureMax': daily_temperature_2m_max,
+        'TemperatureMin': daily_temperature_2m_min,
+        'Precipitation': daily_precipitation_sum
+    }, copy=False)
+
+    # Drop rows with all NA values, only copying the frame if there are any
+    all_missing = (np.isnan(daily_temperature_2m_max) & np.isnan(daily_temperature_2m_min)
+                   & np.isnan(daily_precipitation_sum))
+    if all_missing.any():
+        daily_dataframe = daily_dataframe[~all_missing].reset_index(drop=True)
+
+    if fast:
+        return daily_dataframe
+    return format_weather_dataframe(daily_dataframe)
+
+# Format a daily weather DataFrame for display and export:
+# 'YYYY-MM-DD' date strings and float64 values rounded to one decimal
+def format_weather_dataframe(daily_dataframe):
+    # Only the converted columns are new; the input frame is left unchanged
+    formatted_columns = {}
+    if pd.api.types.is_datetime64_any_dtype(daily_dataframe['Date']):
+        formatted_columns['Date'] = daily_dataframe['Date'].dt.strftime('%Y-%m-%d')
+
+    float32_columns = daily_dataframe.select_dtypes(include=['float32']).columns
+    for column in float32_columns:
+        formatted_columns[column] = daily_dataframe[column].astype('float64').round(1)
+    return daily_dataframe.assign(**formatted_columns).reset_index(drop=True)
+
 # Get weather data from API
 class weatherData:
-    def __init__(self, inputs):
+    def __init__(self, inputs, store=None, fast_decode=False, coalescer=None, session=None):
         # Initialize instance attributes
         self.latitude = inputs['latitude']
         self.longitude = inputs['longitude']
+        # Optional RequestCoalescer, so concurrent requests for the same grid cell share
+        # one download; the coordinates are snapped to the cell so the requests match
+        self.coalescer = coalescer
+        if coalescer is not None:
+            self.latitude, self.longitude = coalescer.snap(self.latitude, self.longitude)
         self.start_date = inputs['start_date']
-        self.end_date = date.today()
+        self.end_date = inputs.get('end_date') or date.today()
+        # Optional local WeatherStore, so only days that are not stored yet are downloaded
+        self.store = store
+        # Keep datetime64 dates and float32 values; strings are only made at export time
+        self.fast_decode = fast_decode
         
-        # Set up the Open-Meteo API client with caching and retries
-        self.cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-        self.retry_session = retry(self.cache_session, retries=5, backoff_factor=0.2)
-        self.client = openmeteo_requests.Client(session=self.retry_session)
+        # Set up the Open-Meteo API client on the shared session with caching and retries,
+        # unless another session is given
+        self.session = session if session is not None else get_session()
+        self.client = openmeteo_requests.Client(session=self.session)
         self.url = "https://historical-forecast-api.open-meteo.com/v1/forecast"
 
     def get_weather_data(self):
+        if self.store is None:
+            return self.request_weather_data(self.start_date, self.end_date)
+
+        # Download only the date ranges missing from the local store, then serve from it
+        refresh_after = date.today() - timedelta(days=REFRESH_DAYS)
+        with run_metrics.span("weather store"):
+            missing_ranges = self.store.missing_ranges(self.latitude, self.longitude, self.start_date, self.end_date, refresh_after)
+        for start_date, end_date in missing_ranges:
+            # Store each chunk as soon as it arrives, so a failed chunk never loses the others
+            self.request_weather_data(start_date, end_date,
+                                      on_chunk=lambda chunk: self.store.write(self.latitude, self.longitude, chunk))
+        with run_metrics.span("weather store"):
+            stored_data = self.store.read(self.latitude, self.longitude, self.start_date, self.end_date)
+        if self.fast_decode:
+            return stored_data
+        return format_weather_dataframe(stored_data)
+
+    # Request a date range, sharing the download with an identical or covering
+    # request already in flight when a coalescer is set
+    def request_weather_data(self, start_date, end_date, on_chunk=None):
+        if self.coalescer is None:
+            return self.download_weather_data(start_date, end_date, on_chunk)
+
+        downloaded = []
+        def fetch(start_date, end_date):
+            downloaded.append(True)
+            return self.download_weather_data(start_date, end_date, on_chunk)
+
+        variables = (self.fast_decode, *DAILY_VARIABLES)
+        daily_dataframe = self.coalescer.request(self.latitude, self.longitude, start_date, end_date,
+                                                 fetch, variables).result()
+        # Data downloaded by another request still has to reach this request's store
+        if on_chunk is not None and not downloaded:
+            on_chunk(daily_dataframe)
+        return daily_dataframe
+
+    # Download a date range. Long ranges are split into year-sized chunks that are
+    # fetched in parallel and retried independently; each chunk is passed to on_chunk
+    # as it arrives, and the stitched result is returned in date order.
+    def download_weather_data(self, start_date, end_date, on_chunk=None):
+        chunks = split_date_range(start_date, end_date, FETCH_CHUNK_DAYS)
+        if len(chunks) == 1:
+            daily_dataframe = self.request_chunk(*chunks[0])
+            if on_chunk is not None:
+                on_chunk(daily_dataframe)
+            return daily_dataframe
+
+        results = {}
+        errors = []
+        with fetch_scheduler.FetchScheduler(max_workers=FETCH_CHUNK_WORKERS) as scheduler:
+            futures = {scheduler.submit(self.request_chunk, chunk_start, chunk_end): chunk_start
+                       for chunk_start, chunk_end in chunks}
+            for future in as_completed(futures):
+                try:
+                    daily_dataframe = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                results[futures[future]] = daily_dataframe
+                if on_chunk is not None:
+                    on_chunk(daily_dataframe)
+
+        # Only raise once every other chunk has been handed over
+        if errors:
+            raise errors[0]
+        return pd.concat([results[chunk_start] for chunk_start, _ in chunks], ignore_index=True)
+
+    def request_chunk(self, start_date, end_date):
         # Prepare request parameters
         params = {
             "latitude": self.latitude,
             "longitude": self.longitude,
-            "start_date": self.start_date,
-            "end_date": self.end_date,
-            "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+            "start_date": start_date,
+            "end_date": end_date,
+            "daily": DAILY_VARIABLES
         }
         
-        # Make the API request
-        responses = self.client.weather_api(self.url, params=params)
+        # Make the API request (the session retries this chunk on its own if it fails).
+        # Every request takes a token from the process-wide Open-Meteo rate limit
+        fetch_scheduler.acquire("open-meteo")
+        with run_metrics.span("open-meteo request"):
+            responses = self.client.weather_api(self.url, params=params)
         response = responses[0]
 
-        # Process daily data
-        daily = response.Daily()
-        daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
-        daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
-        daily_precipitation_sum = daily.Variables(2).ValuesAsNumpy()
-        
- 
-        daily_data = {"date": pd.date_range(
-            start = pd.to_datetime(daily.Time(), unit = "s", utc = True),
-            end = pd.to_datetime(daily.TimeEnd(), unit = "s", utc = True),
-            freq = pd.Timedelta(seconds = daily.Interval()),
-            inclusive = "left"
-        )}
-
-        daily_data["temperature_2m_max"] = daily_temperature_2m_max
-        daily_data["temperature_2m_min"] = daily_temperature_2m_min
-        daily_data["precipitation_sum"] = daily_precipitation_sum
-
-        daily_dataframe = pd.DataFrame(data=daily_data)
-
-        # # Format and clean the DataFrame
-        daily_dataframe['Date'] = daily_dataframe['date'].dt.strftime('%Y-%m-%d')
-        daily_dataframe = daily_dataframe.drop(columns=['date'])
-        daily_dataframe.columns = ['TemperatureMax', 'TemperatureMin', 'Precipitation', 'Date']
-        # Reorder columns
-        daily_dataframe = daily_dataframe[['Date','TemperatureMax', 'TemperatureMin', 'Precipitation']]
-
-        # # Drop rows with all NA values in specific columns
-        columns_to_check = ['TemperatureMax', 'TemperatureMin', 'Precipitation']
-        daily_dataframe = daily_dataframe.dropna(subset=columns_to_check, how='all')
-        
-        float32_columns = daily_dataframe.select_dtypes(include=['float32']).columns
-        daily_dataframe[float32_columns] = daily_dataframe[float32_columns].astype('float64').round(1)
-        daily_dataframe = daily_dataframe.reset_index(drop=True)
-
-        return daily_dataframe
+        with run_metrics.span("dataframe cleaning"):
+            return process_daily_response(response, fast=self.fast_decode)
     
+    # Get hourly variables reduced to daily and weekly aggregates. Hourly data is
+    # requested one chunk at a time and only the daily rows are kept, so the full
+    # hourly matrix for a long range is never held in memory.
+    def get_hourly_aggregates(self, aggregations=None, chunk_days=HOURLY_CHUNK_DAYS):
+        if aggregations is None:
+            aggregations = hourly_weather.HOURLY_AGGREGATIONS
+        daily_frames = []
+        for start_date, end_date in split_date_range(self.start_date, self.end_date, chunk_days):
+            params = {
+                "latitude": self.latitude,
+                "longitude": self.longitude,
+                "start_date": start_date,
+                "end_date": end_date,
+                "hourly": list(aggregations)
+            }
+            fetch_scheduler.acquire("open-meteo")
+            response = self.client.weather_api(self.url, params=params)[0]
+            daily_frames.append(hourly_weather.aggregate_hourly_response(response, aggregations))
+
+        daily_aggregates = pd.concat(daily_frames, ignore_index=True)
+        return daily_aggregates, hourly_weather.weekly_from_daily(daily_aggregates)
+
     # Option to output weather data as a .csv
-    def export_weather_data(self, export=False):
+    def export_weather_data(self, export=False, weather_data=None):
         if export:
-            weather_data = self.get_weather_data()
+            # Reuse weather data that was already fetched, if it is passed in
+            if weather_data is None:
+                weather_data = self.get_weather_data()
             # Output to CSV
 
             print("Please use the GUI to select a destination for your .csv download")
+            import tkinter as tk
+            from tkinter import filedialog
             
             # Hide the root tkinter window
             root = tk.Tk()
@@ -183,7 +407,8 @@ class weatherData:
                 output_file = output_dir / f"{date_str}_weather_data.csv"
 
                 # Save the data to the specified file
-                weather_data.to_csv(output_file, index=False)
+                with run_metrics.span("csv export"):
+                    weather_data.to_csv(output_file, index=False, date_format='%Y-%m-%d')
                 print(f"File saved to: {output_file}")
             else:
                 print("No directory selected.")
@@ -191,12 +416,84 @@ class weatherData:
             pass
 
 
-# Analyze precipitation data
+# Get weather data for many farms at once using multi-location API requests
+class batchWeatherData:
+    def __init__(self, farms, batch_size=BATCH_SIZE, fast_decode=False):
+        # Accept a list of farm dictionaries or a DataFrame with one row per farm
+        farms = pd.DataFrame(farms).reset_index(drop=True)
+        if 'farm_id' not in farms.columns:
+            farms['farm_id'] = farms.index
+        if 'end_date' not in farms.columns:
+            farms['end_date'] = date.today()
+        farms['end_date'] = farms['end_date'].fillna(date.today())
+        # Use strings so farms with the same date range group together
+        farms['start_date'] = farms['start_date'].astype(str)
+        farms['end_date'] = farms['end_date'].astype(str)
+        self.farms = farms
+        self.batch_size = batch_size
+        self.fast_decode = fast_decode
+
+        # Set up the Open-Meteo API client on the shared session with caching and retries
+        self.session = get_session()
+        self.client = openmeteo_requests.Client(session=self.session)
+        self.url = "https://historical-forecast-api.open-meteo.com/v1/forecast"
+
+    def get_weather_data(self):
+        frames = []
+        # A request shares one date range, so group the farms by their range first
+        for (start_date, end_date), group in self.farms.groupby(['start_date', 'end_date'], sort=False):
+            for offset in range(0, len(group), self.batch_size):
+                batch = group.iloc[offset:offset + self.batch_size]
+                params = {
+                    "latitude": ",".join(str(lat) for lat in batch['latitude']),
+                    "longitude": ",".join(str(lon) for lon in batch['longitude']),
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "daily": DAILY_VARIABLES
+                }
+                fetch_scheduler.acquire("open-meteo")
+                responses = self.client.weather_api(self.url, params=params)
+
+                # Responses come back in the same order as the requested locations
+                for farm_id, response in zip(batch['farm_id'], responses):
+                    daily_dataframe = process_daily_response(response, fast=self.fast_decode)
+                    daily_dataframe.insert(0, 'FarmId', farm_id)
+                    frames.append(daily_dataframe)
+
+        if not frames:
+            return pd.DataFrame(columns=['FarmId', 'Date', 'TemperatureMax', 'TemperatureMin', 'Precipitation'])
+        return pd.concat(frames, ignore_index=True)
+
+
+# Fetch weather data for many farms concurrently through a FetchScheduler.
+# Farms in the same model grid cell with overlapping date ranges share one request,
+# and each request still goes through the weatherData retry session.
+def fetch_weather_data(farms, scheduler=None):
+    if scheduler is None:
+        with fetch_scheduler.FetchScheduler() as scheduler:
+            return fetch_weather_data(farms, scheduler)
+    farms = list(farms)
+    requests, assignments = request_coalescer.plan_requests(farms)
+    # Each Open-Meteo request takes its own rate limit token inside weatherData
+    request_data = scheduler.map(lambda request: weatherData(request).get_weather_data(), requests)
+    return [request_coalescer.slice_date_range(request_data[index], farm['start_date'], farm.get('end_date') or date.today())
+            for farm, index in zip(farms, assignments)]
+
+# Look up the municipality of many farms concurrently through a FetchScheduler
+def fetch_municipalities(farms, scheduler=None):
+    if scheduler is None:
+        with fetch_scheduler.FetchScheduler() as scheduler:
+            return fetch_municipalities(farms, scheduler)
+    return scheduler.map(lambda farm: locationData(farm).get_municipality(), farms, limit="geoapi")
+
+
+# Analyze precipitation data.
+# The input frame is never changed, so several stages can share it safely.
 def precipitation_data_avg(data):
     # Convert the 'date' column to datetime
-    data['Date'] = pd.to_datetime(data['Date'])
+    dates = pd.to_datetime(data['Date'])
     # Option for rolling window
-    date_range = data['Date'].max() - data['Date'].min()
+    date_range = dates.max() - dates.min()
 
     # Get the number of days from timedelta
     num_days = date_range.days
@@ -212,13 +509,11 @@ def precipitation_data_avg(data):
         # print("Window is 30")
         rolling_average = data['Precipitation'].rolling(window=30, min_periods=1).mean()
     
-    # ra_df = pd.DataFrame(rolling_average)
-    data['Rolling_Average'] = rolling_average
-    
-    # Drop temperature related columns
-    # Dropping specific columns
+    # Drop temperature related columns by selecting the others, then add the
+    # converted dates and the rolling average as new columns of the result
     columns_to_drop = ['TemperatureMax', 'TemperatureMin']
-    df_precip = data.drop(columns=columns_to_drop)
+    columns_to_keep = [column for column in data.columns if column not in columns_to_drop]
+    df_precip = data[columns_to_keep].assign(Date=dates, Rolling_Average=rolling_average)
 
     return df_precip
 
@@ -244,7 +539,109 @@ def precipitation_quick_stats(data):
     stats_df = pd.DataFrame([stats])
     print("Precipitation quick stats:")
     print(stats_df)
+    return stats_df
+
+
+# Compute the weather data and each product derived from it once per run,
+# so the export, precipitation and temperature stages all reuse the same results
+class weatherPipeline:
+    def __init__(self, weather):
+        self.weather = weather
+
+    @cached_property
+    def weather_df(self):
+        return self.weather.get_weather_data()
+
+    @cached_property
+    def precipitation_df(self):
+        return precipitation_data_avg(self.weather_df)
+
+    @cached_property
+    def precipitation_stats(self):
+        return precipitation_quick_stats(self.precipitation_df)
+
+    @cached_property
+    def daily_range(self):
+        return temp_analysis.TemperatureAnalyzer(self.weather_df).calculate_daily_range()
+
+    # Export the weather data and every derived product to one folder, as CSV,
+    # Parquet or Feather files (extra options such as compression go to export_frame)
+    def export_all(self, output_dir, format="csv", **export_options):
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        date_str = datetime.now().strftime("%Y-%m-%d")  # Format: YYYY-MM-DD
+        products = {
+            "weather_data": self.weather_df,
+            "precipitation": self.precipitation_df,
+            "precipitation_stats": self.precipitation_stats,
+            "daily_range": self.daily_range,
+        }
+        output_files = []
+        for name, data in products.items():
+            with run_metrics.span(f"{format} export"):
+                output_file = weather_export.export_frame(data, output_dir / f"{date_str}_{name}", format, **export_options)
+            output_files.append(output_file)
+        print(f"Files saved to: {output_dir}")
+        return output_files
+
+
+# Run the weather analysis without prompts or a GUI, for batch workers and headless containers.
+# The weather data and every derived product are exported to output_dir.
+def run_headless(latitude, longitude, start_date, output_dir, end_date=None, store_dir=".weather_store", format="csv"):
+    inputs = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+    weather = weatherData(inputs, store=weather_store.WeatherStore(store_dir))
+    pipeline = weatherPipeline(weather)
+    return pipeline.export_all(output_dir, format)
+
+# Non-interactive entry point: python project.py --latitude ... --longitude ... --start-date ... --output-dir ...
+# Command line entry point. --latitude and --longitude select the headless mode, which
+# needs --start-date and --output-dir; without them the interactive tool runs.
+# --profile works in both modes
+def cli_main(argv=None, headless=False):
+    parser = argparse.ArgumentParser(description="Download and analyze weather data, with prompts or, given a location, without them")
+    parser.add_argument("--latitude", type=float, default=None)
+    parser.add_argument("--longitude", type=float, default=None)
+    parser.add_argument("--start-date", default=None, help="YYYY-MM-DD, for the headless mode")
+    parser.add_argument("--end-date", default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--output-dir", default=None, help="for the headless mode")
+    parser.add_argument("--format", choices=["csv", "parquet", "feather"], default="csv")
+    parser.add_argument("--profile", default=None, help="Write a cProfile and tracemalloc report to this file")
+    args = parser.parse_args(argv)
+
+    if not headless and args.latitude is None and args.longitude is None:
+        headless_only = [flag for flag, value in [("--start-date", args.start_date), ("--end-date", args.end_date),
+                                                  ("--output-dir", args.output_dir)] if value is not None]
+        if headless_only:
+            parser.error(f"{', '.join(headless_only)} can only be used with --latitude and --longitude")
+        main(profile_path=args.profile)
+        return
+
+    missing = [flag for flag, value in [("--latitude", args.latitude), ("--longitude", args.longitude),
+                                        ("--start-date", args.start_date), ("--output-dir", args.output_dir)] if value is None]
+    if missing:
+        parser.error(f"the headless mode needs {', '.join(missing)}")
+
+    print(f"Startup took {IMPORT_TIME * 1000:.1f} ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)")
+    if IMPORT_TIME > STARTUP_BUDGET_SECONDS:
+        print("Warning: startup is over budget")
+    metrics = run_metrics.RunMetrics()
+    with metrics, run_metrics.profile(args.profile):
+        run_headless(args.latitude, args.longitude, args.start_date, args.output_dir, args.end_date, format=args.format)
+    print(f"Run took {metrics.elapsed:.2f} s")
+    print(metrics.report())
+
+# Run without prompts; the location, start date and output directory are required
+def headless_main(argv=None):
+    cli_main(argv, headless=True)
+
 
+# Time spent importing project.py, reported against STARTUP_BUDGET_SECONDS
+IMPORT_TIME = time.perf_counter() - _import_started
 
 if __name__ == "__main__":
-    main()
+    cli_main()
@@ -0,0 +1,222 @@
+import argparse
+import time
+import warnings
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import project
+from precip_analysis.precip_analysis import rolling_precipitation
+from temp_analysis.temp_analysis import detect_extreme_events
+from weather_export.weather_export import export_frame
+
+# Grid resolution in degrees (about 11 x 9 km over Portugal)
+DEFAULT_RESOLUTION = 0.1
+
+# Thresholds used for the summary rasters, matching TemperatureAnalyzer's defaults
+HEAT_THRESHOLD = 35
+COLD_THRESHOLD = 5
+HEATWAVE_MIN_DAYS = 3
+RAINY_DAY_MM = 1.0
+
+# Columns of the weather data kept in the cube
+CUBE_VARIABLES = ["TemperatureMax", "TemperatureMin", "Precipitation"]
+
+def grid_axes(bbox, resolution=DEFAULT_RESOLUTION):
+    """
+    Return the latitudes and longitudes of the centers of a grid covering a bounding
+    box (min_lat, min_lon, max_lat, max_lon), from south to north and west to east.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    num_lats = max(1, int(np.ceil(round((max_lat - min_lat) / resolution, 6))))
+    num_lons = max(1, int(np.ceil(round((max_lon - min_lon) / resolution, 6))))
+    latitudes = np.round(min_lat + (np.arange(num_lats) + 0.5) * resolution, 6)
+    longitudes = np.round(min_lon + (np.arange(num_lons) + 0.5) * resolution, 6)
+    return latitudes, longitudes
+
+def concelho_region(resolver, concelho, resolution=DEFAULT_RESOLUTION):
+    """
+    Return the grid axes covering a concelho and a lat x lon mask of the cells whose
+    centers fall inside it, using the boundary polygons of an OfflineResolver.
+    """
+    polygon_ids = [index for index, answer in enumerate(resolver.answers)
+                   if str(answer["concelho"]).lower() == concelho.lower()]
+    if not polygon_ids:
+        raise ValueError(f"Concelho not found in the boundaries file: {concelho}")
+    west, south = resolver.bounds[polygon_ids, :2].min(axis=0)
+    east, north = resolver.bounds[polygon_ids, 2:].max(axis=0)
+    latitudes, longitudes = grid_axes((south, west, north, east), resolution)
+
+    grid_lats, grid_lons = np.meshgrid(latitudes, longitudes, indexing="ij")
+    polygon_of_cell = resolver.resolve_many(grid_lats.ravel(), grid_lons.ravel())
+    mask = np.isin(polygon_of_cell, polygon_ids).reshape(grid_lats.shape)
+    return latitudes, longitudes, mask
+
+class WeatherCube:
+    def __init__(self, latitudes, longitudes, dates, values, mask=None):
+        """
+        Initialize a cube of daily weather over a grid.
+        `values` maps each weather column to a lat x lon x time float32 array, with
+        NaN where there is no data; `mask` marks the cells that belong to the region.
+        """
+        self.latitudes = np.asarray(latitudes)
+        self.longitudes = np.asarray(longitudes)
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = values
+        if mask is None:
+            mask = np.ones((len(self.latitudes), len(self.longitudes)), dtype=bool)
+        self.mask = mask
+
+    @property
+    def shape(self):
+        return (len(self.latitudes), len(self.longitudes), len(self.dates))
+
+    def cells(self, column):
+        """
+        Return one column as a cells x days array (cells in row-major lat, lon order),
+        the layout used by the vectorized analyses.
+        """
+        return self.values[column].reshape(-1, len(self.dates))
+
+def fetch_cube(latitudes, longitudes, start_date, end_date, mask=None, batch_size=project.BATCH_SIZE):
+    """
+    Fetch daily weather for every grid cell in the mask with multi-location requests
+    of up to `batch_size` cells, and return it as a WeatherCube.
+    Long ranges are requested in year-sized chunks, each scattered into the cube as it arrives.
+    """
+    latitudes, longitudes = np.asarray(latitudes), np.asarray(longitudes)
+    if mask is None:
+        mask = np.ones((len(latitudes), len(longitudes)), dtype=bool)
+    lat_index, lon_index = np.nonzero(mask)
+    cells = pd.DataFrame({
+        "farm_id": lat_index * len(longitudes) + lon_index,
+        "latitude": latitudes[lat_index],
+        "longitude": longitudes[lon_index],
+    })
+
+    dates = pd.date_range(start_date, end_date, freq="D")
+    num_cells = len(latitudes) * len(longitudes)
+    cubes = {column: np.full((num_cells, len(dates)), np.nan, dtype=np.float32) for column in CUBE_VARIABLES}
+    for chunk_start, chunk_end in project.split_date_range(start_date, end_date, project.FETCH_CHUNK_DAYS):
+        chunk_cells = cells.assign(start_date=str(chunk_start), end_date=str(chunk_end))
+        data = project.batchWeatherData(chunk_cells, batch_size=batch_size, fast_decode=True).get_weather_data()
+
+        # Scatter the long-format rows into the cube in one step per column
+        cell_index = data["FarmId"].to_numpy(dtype=np.int64)
+        day_index = ((pd.to_datetime(data["Date"]) - dates[0]) // pd.Timedelta(days=1)).to_numpy()
+        in_range = (day_index >= 0) & (day_index < len(dates))
+        for column, cube in cubes.items():
+            cube[cell_index[in_range], day_index[in_range]] = data[column].to_numpy()[in_range]
+
+    values = {column: cube.reshape(len(latitudes), len(longitudes), len(dates)) for column, cube in cubes.items()}
+    return WeatherCube(latitudes, longitudes, dates, values, mask)
+
+def summarize_cube(cube, heat_threshold=HEAT_THRESHOLD, cold_threshold=COLD_THRESHOLD,
+                   heatwave_min_days=HEATWAVE_MIN_DAYS, rainy_day_mm=RAINY_DAY_MM):
+    """
+    Run the temperature and precipitation analyses over every cell at once.
+    Returns a dict of lat x lon rasters, with NaN outside the region's mask.
+    """
+    temperature_max = cube.cells("TemperatureMax").astype(np.float64)
+    temperature_min = cube.cells("TemperatureMin").astype(np.float64)
+    precipitation = cube.cells("Precipitation").astype(np.float64)
+    num_cells = temperature_max.shape[0]
+    has_precipitation = ~np.isnan(precipitation)
+
+    heatwaves = detect_extreme_events(temperature_max, heat_threshold, True, heatwave_min_days)
+    rolling = rolling_precipitation(precipitation, windows=(30,), stats=("sum",))
+    with warnings.catch_warnings():
+        # Cells outside the region have no values at all and become NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        summaries = {
+            "temperature_max_mean": np.nanmean(temperature_max, axis=1),
+            "temperature_min_mean": np.nanmean(temperature_min, axis=1),
+            "daily_range_mean": np.nanmean(temperature_max - temperature_min, axis=1),
+            "temperature_max_peak": np.nanmax(temperature_max, axis=1),
+            "temperature_min_lowest": np.nanmin(temperature_min, axis=1),
+            "heat_days": (temperature_max > heat_threshold).sum(axis=1).astype(np.float64),
+            "cold_days": (temperature_min < cold_threshold).sum(axis=1).astype(np.float64),
+            "heatwaves": np.bincount(heatwaves["FarmId"].to_numpy(dtype=np.int64), minlength=num_cells).astype(np.float64),
+            "precipitation_total": np.where(has_precipitation.any(axis=1), np.nansum(precipitation, axis=1), np.nan),
+            "rainy_days": (precipitation >= rainy_day_mm).sum(axis=1).astype(np.float64),
+            "precipitation_max_day": np.nanmax(precipitation, axis=1),
+            "precipitation_max_30_days": np.nanmax(rolling[("sum", 30)], axis=1),
+        }
+
+    shape = cube.mask.shape
+    return {name: np.where(cube.mask, summary.reshape(shape), np.nan) for name, summary in summaries.items()}
+
+def rasters_frame(cube, rasters):
+    """
+    Return the rasters as a table with one row per cell in the region: Latitude, Longitude and one column per raster.
+    """
+    lat_index, lon_index = np.nonzero(cube.mask)
+    frame = {"Latitude": cube.latitudes[lat_index], "Longitude": cube.longitudes[lon_index]}
+    for name, raster in rasters.items():
+        frame[name] = raster[lat_index, lon_index]
+    return pd.DataFrame(frame)
+
+def _cell_size(latitudes, longitudes):
+    # Grid spacing, from whichever axis has more than one cell
+    for axis in (latitudes, longitudes):
+        if len(axis) > 1:
+            return float(np.round(axis[1] - axis[0], 6))
+    return DEFAULT_RESOLUTION
+
+def write_ascii_grid(path, raster, latitudes, longitudes, nodata=-9999):
+    """
+    Write a lat x lon raster as an ESRI ASCII grid, which GIS tools such as QGIS open directly.
+    """
+    cell_size = _cell_size(latitudes, longitudes)
+    header = (f"ncols {len(longitudes)}\nnrows {len(latitudes)}\n"
+              f"xllcorner {longitudes[0] - cell_size / 2:.6f}\nyllcorner {latitudes[0] - cell_size / 2:.6f}\n"
+              f"cellsize {cell_size}\nNODATA_value {nodata}\n")
+    # Rows are written from north to south
+    rows = np.where(np.isnan(raster), nodata, raster)[::-1]
+    with open(path, "w") as file:
+        file.write(header)
+        np.savetxt(file, rows, fmt="%.2f")
+    return Path(path)
+
+def save_rasters(cube, rasters, output_dir, format="csv"):
+    """
+    Write every raster as <output_dir>/<name>.asc and the per-cell table as region_summary.
+    Returns the paths written.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [write_ascii_grid(output_dir / f"{name}.asc", raster, cube.latitudes, cube.longitudes)
+             for name, raster in rasters.items()]
+    paths.append(export_frame(rasters_frame(cube, rasters), output_dir / "region_summary", format))
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze the weather over a grid covering a region.")
+    region = parser.add_mutually_exclusive_group(required=True)
+    region.add_argument("--bbox", type=float, nargs=4, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"))
+    region.add_argument("--concelho", help="Name of a concelho in the --boundaries file")
+    parser.add_argument("--boundaries", help="GeoJSON boundaries file, as used by OfflineResolver")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION, help="Grid resolution in degrees")
+    parser.add_argument("--start-date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end-date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--format", choices=["csv", "parquet", "feather"], default="csv")
+    args = parser.parse_args(argv)
+
+    if args.concelho:
+        if not args.boundaries:
+            parser.error("--concelho needs a --boundaries file")
+        from geo_lookup.geo_lookup import OfflineResolver
+        latitudes, longitudes, mask = concelho_region(OfflineResolver(args.boundaries), args.concelho, args.resolution)
+    else:
+        latitudes, longitudes = grid_axes(args.bbox, args.resolution)
+        mask = None
+
+    started = time.perf_counter()
+    cube = fetch_cube(latitudes, longitudes, args.start_date, args.end_date, mask)
+    rasters = summarize_cube(cube)
+    save_rasters(cube, rasters, args.output_dir, args.format)
+    print(f"Analyzed {int(cube.mask.sum())} grid cells x {len(cube.dates)} days in {time.perf_counter() - started:.1f} s")
+    print(f"Rasters saved to: {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
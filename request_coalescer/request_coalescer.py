@@ -0,0 +1,141 @@
+import threading
+from concurrent.futures import Future
+from datetime import date, timedelta
+import pandas as pd
+
+# Size in degrees of the grid requests are snapped to. This is the finest grid among
+# the models Open-Meteo blends over Portugal (Meteo-France AROME, 0.025 degrees), so
+# points in the same cell get the same model data.
+MODEL_GRID_SIZE = 0.025
+
+def snap_to_grid(latitude, longitude, grid_size=MODEL_GRID_SIZE):
+    """
+    Return the center of the grid cell containing a point, as a (latitude, longitude) tuple.
+    """
+    digits = len(f"{grid_size:.10f}".rstrip("0").split(".")[1]) + 1
+    return (round(round(float(latitude) / grid_size) * grid_size, digits),
+            round(round(float(longitude) / grid_size) * grid_size, digits))
+
+def to_date(value):
+    """
+    Convert a date, datetime or 'YYYY-MM-DD' string to a date.
+    """
+    return pd.Timestamp(value).date()
+
+def merge_date_ranges(ranges):
+    """
+    Merge overlapping or adjacent (start, end) date ranges.
+    Returns the merged ranges in date order.
+    """
+    merged = []
+    for start, end in sorted((to_date(start), to_date(end)) for start, end in ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def slice_date_range(data, start_date, end_date):
+    """
+    Return the rows of a weather dataframe between two dates, inclusive.
+    Works with both string and datetime64 `Date` columns.
+    """
+    dates = pd.to_datetime(data["Date"])
+    in_range = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+    return data[in_range.to_numpy()].reset_index(drop=True)
+
+def plan_requests(farms, grid_size=MODEL_GRID_SIZE):
+    """
+    Coalesce many farm requests into as few API requests as possible.
+    Farms in the same grid cell whose date ranges overlap or touch share one request.
+    Returns the merged requests, as dictionaries for `weatherData`, and for each farm
+    the index of the merged request that covers it.
+    """
+    ranges_by_cell = {}
+    for farm in farms:
+        cell = snap_to_grid(farm["latitude"], farm["longitude"], grid_size)
+        end_date = farm.get("end_date") or date.today()
+        ranges_by_cell.setdefault(cell, []).append((farm["start_date"], end_date))
+
+    requests = []
+    first_request = {}
+    for cell, ranges in ranges_by_cell.items():
+        first_request[cell] = len(requests)
+        for start, end in merge_date_ranges(ranges):
+            requests.append({"latitude": cell[0], "longitude": cell[1], "start_date": start, "end_date": end})
+
+    assignments = []
+    for farm in farms:
+        cell = snap_to_grid(farm["latitude"], farm["longitude"], grid_size)
+        start = to_date(farm["start_date"])
+        index = first_request[cell]
+        while requests[index]["end_date"] < start:
+            index += 1
+        assignments.append(index)
+    return requests, assignments
+
+class RequestCoalescer:
+    def __init__(self, grid_size=MODEL_GRID_SIZE):
+        """
+        Initialize a coalescer that lets concurrent requests for the same grid cell
+        share one download. Requests are keyed by grid cell and variables.
+        """
+        self.grid_size = grid_size
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        # Number of downloads made and number of requests answered by another download
+        self.fetches = 0
+        self.shared = 0
+
+    def snap(self, latitude, longitude):
+        """
+        Return the center of the grid cell containing a point.
+        """
+        return snap_to_grid(latitude, longitude, self.grid_size)
+
+    def request(self, latitude, longitude, start_date, end_date, fetch, variables=()):
+        """
+        Return a Future with the data for a date range at a point.
+        If an identical or covering request for the same cell and variables is already
+        in flight, its Future is shared (sliced to the range when it is wider).
+        Otherwise `fetch(start_date, end_date)` is called in this thread.
+        """
+        key = (self.snap(latitude, longitude), tuple(variables))
+        start, end = to_date(start_date), to_date(end_date)
+        with self.lock:
+            for (in_flight_start, in_flight_end), future in self.in_flight.get(key, {}).items():
+                if in_flight_start <= start and end <= in_flight_end:
+                    self.shared += 1
+                    if (in_flight_start, in_flight_end) == (start, end):
+                        return future
+                    return _sliced(future, start, end)
+            future = Future()
+            self.in_flight.setdefault(key, {})[(start, end)] = future
+            self.fetches += 1
+
+        try:
+            future.set_result(fetch(start, end))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                requests = self.in_flight[key]
+                del requests[(start, end)]
+                if not requests:
+                    del self.in_flight[key]
+        return future
+
+def _sliced(future, start, end):
+    """
+    Return a Future with the rows of another Future's dataframe between two dates.
+    """
+    sliced = Future()
+
+    def copy_result(source):
+        try:
+            sliced.set_result(slice_date_range(source.result(), start, end))
+        except Exception as e:
+            sliced.set_exception(e)
+
+    future.add_done_callback(copy_result)
+    return sliced
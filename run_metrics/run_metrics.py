@@ -0,0 +1,153 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Lines shown for the slowest functions and the largest allocations in a profile report
+PROFILE_TOP = 25
+
+# RunMetrics collecting spans and counters for the run in progress, if any
+_current = None
+
+class RunMetrics:
+    def __init__(self):
+        """
+        Initialize empty timing spans and counters for one run.
+        Use it as a context manager to make it the run that `span()` and `count()` record into.
+        """
+        self.spans = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = None
+        self.elapsed = None
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time the code inside the block and add it to the stage called `name`.
+        Stages entered several times (or from several threads) add up.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                calls, seconds = self.spans.get(name, (0, 0.0))
+                self.spans[name] = (calls + 1, seconds + elapsed)
+
+    def count(self, name, amount=1):
+        """
+        Add `amount` to the counter called `name`.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        """
+        Return the time per stage, in the order stages were first entered, and the counters as text.
+        """
+        lines = ["Stage timings:"]
+        width = max([len(name) for name in self.spans] + [5])
+        for name, (calls, seconds) in self.spans.items():
+            lines.append(f"  {name:<{width}}  {seconds:8.3f} s  ({calls} call{'s' if calls != 1 else ''})")
+        if self.elapsed is not None:
+            lines.append(f"  {'total':<{width}}  {self.elapsed:8.3f} s")
+        if self.counters:
+            lines.append("Counters:")
+            for name, value in self.counters.items():
+                lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+    def __enter__(self):
+        global _current
+        self.previous = _current
+        self.started = time.perf_counter()
+        _current = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _current
+        self.elapsed = time.perf_counter() - self.started
+        _current = self.previous
+
+@contextmanager
+def span(name):
+    """
+    Time a stage of the run in progress. Does nothing when no run is being measured.
+    """
+    if _current is None:
+        yield
+        return
+    with _current.span(name):
+        yield
+
+def count(name, amount=1):
+    """
+    Add to a counter of the run in progress. Does nothing when no run is being measured.
+    """
+    if _current is not None:
+        _current.count(name, amount)
+
+def track_session(session):
+    """
+    Count cache hits, cache misses, requests sent and bytes downloaded for every
+    response of a session. The counts go to the run in progress; the hook is only
+    installed once per session.
+    """
+    if getattr(session, "tracked_by_run_metrics", False):
+        return session
+    cached = hasattr(session, "cache")
+
+    def record_response(response, *args, **kwargs):
+        from_cache = getattr(response, "from_cache", None)
+        # A cached session calls the hook twice for a download, first with the
+        # plain response, so only its own call is counted
+        if cached and from_cache is None:
+            return response
+        if from_cache:
+            count("cache hits")
+            return response
+        if cached:
+            count("cache misses")
+        count("requests sent")
+        count("bytes downloaded", len(response.content))
+        return response
+
+    session.hooks["response"].append(record_response)
+    session.tracked_by_run_metrics = True
+    return session
+
+@contextmanager
+def profile(path, top=PROFILE_TOP):
+    """
+    Run the block under cProfile and tracemalloc and write a report to `path`:
+    the functions with the most cumulative time and the lines that allocated the most memory.
+    Does nothing when `path` is None.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(top)
+        with open(path, "w") as file:
+            file.write(f"Peak traced memory: {peak_memory / 2**20:.1f} MB\n\n")
+            file.write(f"Top {top} allocations by line:\n")
+            for statistic in snapshot.statistics("lineno")[:top]:
+                file.write(f"  {statistic}\n")
+            file.write("\n")
+            file.write(stats_text.getvalue())
@@ -0,0 +1,372 @@
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import zlib
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import flatbuffers
+import numpy as np
+import pandas as pd
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Unit import Unit
+from openmeteo_sdk.Variable import Variable
+import project
+from fetch_scheduler.fetch_scheduler import FetchScheduler, override_buckets
+from http_session.http_session import get_session
+
+# Paths served, matching the real APIs so only the host part of the URL changes
+WEATHER_PATH = "/v1/forecast"
+GEOAPI_PATH = "/gps"
+
+# Municipalities handed out by the geoapi stand-in, as (distrito, concelho)
+CONCELHOS = [
+    ("Santarém", "Abrantes"), ("Santarém", "Santarém"), ("Lisboa", "Lisboa"), ("Porto", "Porto"),
+    ("Évora", "Évora"), ("Beja", "Beja"), ("Faro", "Loulé"), ("Coimbra", "Coimbra"),
+    ("Braga", "Braga"), ("Viseu", "Viseu"), ("Leiria", "Leiria"), ("Portalegre", "Elvas"),
+]
+
+_AGGREGATION_SUFFIXES = {"max": Aggregation.maximum, "min": Aggregation.minimum,
+                         "mean": Aggregation.mean, "sum": Aggregation.sum}
+_UNITS = {"temperature": Unit.celsius, "precipitation": Unit.millimetre, "relative_humidity": Unit.percentage,
+          "soil_moisture": Unit.cubic_metre_per_cubic_metre, "et0_fao_evapotranspiration": Unit.millimetre}
+
+def parse_variable(name):
+    """
+    Split an Open-Meteo variable name such as "temperature_2m_max" or
+    "soil_moisture_0_to_1cm" into its base variable, altitude, depth and aggregation.
+    """
+    aggregation = Aggregation.none
+    suffix = name.rsplit("_", 1)[-1]
+    if suffix in _AGGREGATION_SUFFIXES:
+        aggregation = _AGGREGATION_SUFFIXES[suffix]
+        name = name.rsplit("_", 1)[0]
+    altitude = depth = depth_to = 0
+    match = re.fullmatch(r"(.+)_(\d+)m", name)
+    if match:
+        name, altitude = match.group(1), int(match.group(2))
+    match = re.fullmatch(r"(.+)_(\d+)_to_(\d+)cm", name)
+    if match:
+        name, depth, depth_to = match.group(1), int(match.group(2)), int(match.group(3))
+    return name, altitude, depth, depth_to, aggregation
+
+def _noise(times, seed):
+    # Repeatable uniform noise in [0, 1) for each timestamp, so the same location and
+    # day always get the same value whatever range was requested
+    return np.modf(np.abs(np.sin(times / 86400.0 * 12.9898 + seed) * 43758.5453))[0]
+
+def synthetic_values(name, times, interval, latitude, longitude):
+    """
+    Return plausible values of one variable at the given unix timestamps:
+    seasonal (and for hourly data, daily) cycles plus repeatable noise for the location.
+    """
+    base, _, _, _, aggregation = parse_variable(name)
+    seed = zlib.crc32(f"{latitude:.2f},{longitude:.2f},{name}".encode()) % 1000
+    day_of_year = pd.to_datetime(times, unit="s").dayofyear.to_numpy()
+    season = np.sin(2 * np.pi * (day_of_year - 110) / 365)
+    hour = (times % 86400) / 3600
+    daily_cycle = np.sin(2 * np.pi * (hour - 9) / 24) if interval < 86400 else 0.0
+    noise = _noise(times, seed) + _noise(times, seed + 1) - 1
+    # Northern and inland parts of Portugal are a little cooler
+    mean_temperature = 16 + 7 * season - 0.8 * (latitude - 38.5)
+
+    if base == "temperature":
+        offset = {Aggregation.maximum: 6, Aggregation.minimum: -6}.get(aggregation, 0)
+        values = mean_temperature + offset + 6 * daily_cycle + 3 * noise
+    elif base == "precipitation":
+        wet = _noise(times, seed + 2) < (0.35 - 0.2 * season) * (1 if interval >= 86400 else 0.1)
+        values = np.where(wet, 12 * _noise(times, seed + 3) ** 2 * (1 if interval >= 86400 else 0.3), 0.0)
+    elif base == "relative_humidity":
+        values = np.clip(72 - 15 * season - 15 * daily_cycle + 10 * noise, 5, 100)
+    elif base == "soil_moisture":
+        values = np.clip(0.25 - 0.1 * season + 0.03 * noise, 0.02, 0.5)
+    elif base == "et0_fao_evapotranspiration":
+        daily_et0 = 3 + 2.5 * season + 0.5 * noise
+        values = daily_et0 if interval >= 86400 else np.maximum(daily_cycle, 0) * daily_et0 / 7.6
+    else:
+        values = 10 * noise
+    return np.round(values, 1).astype(np.float32)
+
+def _build_variables(builder, names, start, end, interval, latitude, longitude):
+    times = np.arange(start, end, interval, dtype=np.int64)
+    variables = []
+    for name in names:
+        base, altitude, depth, depth_to, aggregation = parse_variable(name)
+        values = builder.CreateNumpyVector(synthetic_values(name, times, interval, latitude, longitude))
+        builder.StartObject(13)
+        builder.PrependInt16Slot(9, depth_to, 0)
+        builder.PrependInt16Slot(8, depth, 0)
+        builder.PrependUint8Slot(6, aggregation, 0)
+        builder.PrependInt16Slot(5, altitude, 0)
+        builder.PrependUOffsetTRelativeSlot(3, values, 0)
+        builder.PrependUint8Slot(1, _UNITS.get(base, Unit.undefined), 0)
+        builder.PrependUint8Slot(0, getattr(Variable, base, Variable.undefined), 0)
+        variables.append(builder.EndObject())
+
+    builder.StartVector(4, len(variables), 4)
+    for variable in reversed(variables):
+        builder.PrependUOffsetTRelative(variable)
+    variables_vector = builder.EndVector()
+
+    builder.StartObject(4)
+    builder.PrependUOffsetTRelativeSlot(3, variables_vector, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependInt64Slot(1, end, 0)
+    builder.PrependInt64Slot(0, start, 0)
+    return builder.EndObject()
+
+def build_weather_response(latitude, longitude, start_date, end_date, daily=(), hourly=()):
+    """
+    Build one location's answer in Open-Meteo's FlatBuffers format, with the given
+    daily and hourly variables for every day from start_date to end_date.
+    Returns the message with its 4-byte length prefix, as sent by the API.
+    """
+    start = int(pd.Timestamp(start_date, tz="UTC").timestamp())
+    end = int((pd.Timestamp(end_date, tz="UTC") + pd.Timedelta(days=1)).timestamp())
+    builder = flatbuffers.Builder(1024)
+    daily_table = _build_variables(builder, daily, start, end, 86400, latitude, longitude) if daily else None
+    hourly_table = _build_variables(builder, hourly, start, end, 3600, latitude, longitude) if hourly else None
+    timezone = builder.CreateString("GMT")
+
+    builder.StartObject(15)
+    if hourly_table is not None:
+        builder.PrependUOffsetTRelativeSlot(11, hourly_table, 0)
+    if daily_table is not None:
+        builder.PrependUOffsetTRelativeSlot(10, daily_table, 0)
+    builder.PrependUOffsetTRelativeSlot(8, timezone, 0)
+    builder.PrependUOffsetTRelativeSlot(7, timezone, 0)
+    builder.PrependFloat32Slot(3, 0.5, 0.0)
+    builder.PrependFloat32Slot(2, 100.0, 0.0)
+    builder.PrependFloat32Slot(1, float(longitude), 0.0)
+    builder.PrependFloat32Slot(0, float(latitude), 0.0)
+    builder.Finish(builder.EndObject())
+    message = bytes(builder.Output())
+    return len(message).to_bytes(4, "little") + message
+
+def build_location_answer(latitude, longitude):
+    """
+    Build a geoapi.pt-style answer for a point. The same ~10 km cell always gets the same municipality.
+    """
+    cell = zlib.crc32(f"{round(latitude, 1)},{round(longitude, 1)}".encode())
+    distrito, concelho = CONCELHOS[cell % len(CONCELHOS)]
+    return {
+        "lon": longitude,
+        "lat": latitude,
+        "distrito": distrito,
+        "concelho": concelho,
+        "freguesia": f"{concelho} ({cell % 7 + 1})",
+    }
+
+def _query_list(query, name):
+    # Lists arrive either as repeated keys or comma-separated, like the real API accepts
+    return [item for value in query.get(name, []) for item in value.split(",") if item]
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        standin = self.server.standin
+        url = urlparse(self.path)
+        standin.count("requests")
+        time.sleep(standin.delay())
+
+        failure = standin.failure()
+        if failure == 429:
+            standin.count("rate limited")
+            return self.send_json(429, {"error": True, "reason": "Too many concurrent requests"})
+        if failure == 500:
+            standin.count("errors")
+            return self.send_json(500, {"error": True, "reason": "Internal server error"})
+
+        try:
+            if url.path == WEATHER_PATH:
+                query = parse_qs(url.query)
+                latitudes = [float(value) for value in _query_list(query, "latitude")]
+                longitudes = [float(value) for value in _query_list(query, "longitude")]
+                body = b"".join(build_weather_response(latitude, longitude, query["start_date"][0], query["end_date"][0],
+                                                       _query_list(query, "daily"), _query_list(query, "hourly"))
+                                for latitude, longitude in zip(latitudes, longitudes))
+                return self.send_body(200, body, "application/octet-stream")
+            if url.path.startswith(GEOAPI_PATH + "/"):
+                latitude, longitude = (float(value) for value in url.path[len(GEOAPI_PATH) + 1:].split(","))
+                return self.send_json(200, build_location_answer(latitude, longitude))
+        except (KeyError, ValueError) as e:
+            return self.send_json(400, {"error": True, "reason": f"Invalid request: {e}"})
+        self.send_json(404, {"error": True, "reason": "Not found"})
+
+    def send_json(self, status, data):
+        self.send_body(status, json.dumps(data).encode(), "application/json")
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandInServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=0):
+        """
+        Initialize a local stand-in for the Open-Meteo and geoapi.pt APIs.
+        Every request waits `latency` seconds plus up to `jitter` more, then fails with
+        a 429 with probability `rate_limit_rate` or a 500 with probability `error_rate`.
+        Port 0 picks a free port.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "rate limited": 0, "errors": 0}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def weather_url(self):
+        return self.url + WEATHER_PATH
+
+    @property
+    def geoapi_url(self):
+        return self.url + GEOAPI_PATH
+
+    def delay(self):
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def failure(self):
+        """
+        Return 429 or 500 when this request should fail, otherwise None.
+        """
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.rate_limit_rate:
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+def run_load_test(server, num_requests=200, workers=8, kind="weather", days=365, seed=0):
+    """
+    Send `num_requests` requests for random farms in Portugal to the stand-in, `workers`
+    at a time, through weatherData (kind="weather") or locationData (kind="location").
+    Returns the throughput, failures and latency percentiles in seconds.
+    """
+    rng = random.Random(seed)
+    end_date = pd.Timestamp("2024-12-31").date()
+    start_date = end_date - timedelta(days=days - 1)
+    # Every request is for a different point, so the responses never come from the cache
+    farms = [{"latitude": round(rng.uniform(37.0, 42.0), 4), "longitude": round(rng.uniform(-9.4, -6.3), 4),
+              "start_date": start_date, "end_date": end_date} for _ in range(num_requests)]
+    # A session without a cache, so the load test leaves no responses on disk
+    session = get_session(cache_name=None)
+
+    def one_request(inputs):
+        started = time.perf_counter()
+        try:
+            if kind == "weather":
+                weather = project.weatherData(inputs, session=session)
+                weather.url = server.weather_url
+                weather.get_weather_data()
+            else:
+                location = project.locationData(inputs, session=session)
+                location.base_url = server.geoapi_url
+                # locationData reports HTTP errors as a message instead of raising
+                if not isinstance(location.get_location_data(), dict):
+                    return time.perf_counter() - started, False
+        except Exception:
+            return time.perf_counter() - started, False
+        return time.perf_counter() - started, True
+
+    started = time.perf_counter()
+    # The stand-in has no quota, so the API rate limits are lifted for the test
+    with override_buckets({"open-meteo": None}), FetchScheduler(max_workers=workers, rate_limits={}) as scheduler:
+        results = scheduler.map(one_request, farms)
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results])
+    failures = sum(1 for _, succeeded in results if not succeeded)
+    return {
+        "kind": kind,
+        "requests": num_requests,
+        "failures": failures,
+        "seconds": elapsed,
+        "requests_per_second": num_requests / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(latencies.max()),
+        "mean": statistics.fmean(latencies),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Open-Meteo and geoapi.pt APIs.")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument("--serve", action="store_true", help="Only serve requests until interrupted")
+    parser.add_argument("--requests", type=int, default=200, help="Requests sent per API in the load test")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests in the load test")
+    parser.add_argument("--days", type=int, default=365, help="Days of weather per request in the load test")
+    args = parser.parse_args(argv)
+
+    server = StandInServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    with server:
+        print(f"Open-Meteo stand-in: {server.weather_url}")
+        print(f"geoapi.pt stand-in: {server.geoapi_url}")
+        if args.serve:
+            try:
+                server.thread.join()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        for kind in ["weather", "location"]:
+            result = run_load_test(server, args.requests, args.workers, kind, args.days)
+            print(f"{kind}: {result['requests_per_second']:.1f} requests/s, {result['failures']} failed, "
+                  f"p50 {result['p50'] * 1000:.0f} ms, p95 {result['p95'] * 1000:.0f} ms, "
+                  f"p99 {result['p99'] * 1000:.0f} ms, max {result['max'] * 1000:.0f} ms")
+        print(f"Server counters: {server.counters}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import json
+import math
+from collections import deque
+from pathlib import Path
+import pandas as pd
+
+# Dates are kept as 'YYYY-MM-DD' strings so the stats can be saved as JSON
+def _date_str(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+# Days from the last date added to `date`, or None before the first day
+def _days_since(last_date, date):
+    if last_date is None:
+        return None
+    return (pd.Timestamp(date) - pd.Timestamp(last_date)).days
+
+class RunningExtremes:
+    def __init__(self):
+        """
+        Track the running min and max of a series and the first date each was seen.
+        """
+        self.max = None
+        self.min = None
+        self.max_date = None
+        self.min_date = None
+
+    def update(self, date, value):
+        if value is None or math.isnan(value):
+            return
+        # Strict comparisons keep the first date, like idxmax() and idxmin()
+        if self.max is None or value > self.max:
+            self.max, self.max_date = value, _date_str(date)
+        if self.min is None or value < self.min:
+            self.min, self.min_date = value, _date_str(date)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        extremes = cls()
+        vars(extremes).update(data)
+        return extremes
+
+class RunningMoments:
+    def __init__(self):
+        """
+        Running count, mean and variance with Welford's algorithm.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        if value is None or math.isnan(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self):
+        # Sample standard deviation, like describe()
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        vars(moments).update(data)
+        return moments
+
+class P2Quantile:
+    def __init__(self, p):
+        """
+        Streaming estimate of the p-quantile with the P-square algorithm
+        (Jain and Chlamtac, 1985), which keeps five markers instead of the data.
+        """
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, value):
+        if value is None or math.isnan(value):
+            return
+        heights, positions = self.heights, self.positions
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell the value falls in, extending the outer markers if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(1, 5) if value < heights[i]) - 1
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        heights, positions = self.heights, self.positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1])
+        )
+
+    @property
+    def value(self):
+        if not self.heights:
+            return math.nan
+        if len(self.heights) < 5:
+            # Exact quantile with linear interpolation while there are few values
+            rank = self.p * (len(self.heights) - 1)
+            lower = math.floor(rank)
+            upper = min(lower + 1, len(self.heights) - 1)
+            return self.heights[lower] + (rank - lower) * (self.heights[upper] - self.heights[lower])
+        return self.heights[2]
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        quantile = cls(data["p"])
+        vars(quantile).update(data)
+        return quantile
+
+class RollingWindow:
+    def __init__(self, window):
+        """
+        Mean of the last `window` values with a deque and a running sum.
+        Missing values take a place in the window but are skipped in the mean,
+        like rolling(window, min_periods=1).mean().
+        """
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            oldest = self.values[0]
+            if not math.isnan(oldest):
+                self.total -= oldest
+                self.count -= 1
+        value = math.nan if value is None else value
+        self.values.append(value)
+        if not math.isnan(value):
+            self.total += value
+            self.count += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def to_dict(self):
+        return {"window": self.window, "values": list(self.values), "total": self.total, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        rolling = cls(data["window"])
+        rolling.values.extend(data["values"])
+        rolling.total = data["total"]
+        rolling.count = data["count"]
+        return rolling
+
+class PrecipitationStats:
+    def __init__(self, window=30):
+        """
+        Incremental version of precipitation_quick_stats with a rolling average.
+        """
+        self.extremes = RunningExtremes()
+        self.rolling = RollingWindow(window)
+        self.last_date = None
+
+    def update(self, date, precipitation):
+        """
+        Add one day of precipitation in O(1).
+        Days up to the last one added are ignored, so re-running a day does not count
+        it twice, and skipped days take their place in the rolling window as missing.
+        """
+        days = _days_since(self.last_date, date)
+        if days is not None and days <= 0:
+            return
+        if days is not None:
+            for _ in range(min(days - 1, self.rolling.window)):
+                self.rolling.update(math.nan)
+        precipitation = float(precipitation)
+        self.extremes.update(date, precipitation)
+        self.rolling.update(precipitation)
+        self.last_date = _date_str(date)
+
+    def update_many(self, data):
+        """
+        Add every row of a frame with Date and Precipitation columns, in order.
+        """
+        for day, precipitation in zip(data['Date'], data['Precipitation']):
+            self.update(day, precipitation)
+
+    def quick_stats(self):
+        """
+        Return the same table as precipitation_quick_stats, plus the current rolling average.
+        """
+        return pd.DataFrame([{
+            'max_precipitation': self.extremes.max,
+            'min_precipitation': self.extremes.min,
+            'day_most_rain': self.extremes.max_date,
+            'day_least_rain': self.extremes.min_date,
+            'rolling_average': self.rolling.mean,
+        }])
+
+    def to_dict(self):
+        return {"extremes": self.extremes.to_dict(), "rolling": self.rolling.to_dict(), "last_date": self.last_date}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.extremes = RunningExtremes.from_dict(data["extremes"])
+        stats.rolling = RollingWindow.from_dict(data["rolling"])
+        stats.last_date = data["last_date"]
+        return stats
+
+class TemperatureStats:
+    COLUMNS = ['TemperatureMax', 'TemperatureMin']
+    QUANTILES = [0.25, 0.5, 0.75]
+
+    def __init__(self):
+        """
+        Incremental version of TemperatureAnalyzer.calculate_descriptive_statistics.
+        Quartiles are P-square estimates once there are five or more days.
+        """
+        self.moments = {column: RunningMoments() for column in self.COLUMNS}
+        self.extremes = {column: RunningExtremes() for column in self.COLUMNS}
+        self.quantiles = {column: [P2Quantile(p) for p in self.QUANTILES] for column in self.COLUMNS}
+        self.last_date = None
+
+    def update(self, date, temperature_max, temperature_min):
+        """
+        Add one day of temperatures in O(1).
+        Days up to the last one added are ignored, so re-running a day does not count it twice.
+        """
+        days = _days_since(self.last_date, date)
+        if days is not None and days <= 0:
+            return
+        for column, value in zip(self.COLUMNS, [float(temperature_max), float(temperature_min)]):
+            self.moments[column].update(value)
+            self.extremes[column].update(date, value)
+            for quantile in self.quantiles[column]:
+                quantile.update(value)
+        self.last_date = _date_str(date)
+
+    def update_many(self, data):
+        """
+        Add every row of a frame with Date, TemperatureMax and TemperatureMin columns, in order.
+        """
+        for day, temperature_max, temperature_min in zip(data['Date'], data['TemperatureMax'], data['TemperatureMin']):
+            self.update(day, temperature_max, temperature_min)
+
+    def describe(self):
+        """
+        Return a table shaped like DataFrame.describe() for the temperature columns.
+        """
+        table = {}
+        for column in self.COLUMNS:
+            moments = self.moments[column]
+            extremes = self.extremes[column]
+            quartiles = [quantile.value for quantile in self.quantiles[column]]
+            table[column] = [moments.count, moments.mean if moments.count else math.nan, moments.std,
+                             extremes.min, *quartiles, extremes.max]
+        return pd.DataFrame(table, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+    def to_dict(self):
+        return {
+            "moments": {column: moments.to_dict() for column, moments in self.moments.items()},
+            "extremes": {column: extremes.to_dict() for column, extremes in self.extremes.items()},
+            "quantiles": {column: [quantile.to_dict() for quantile in quantiles] for column, quantiles in self.quantiles.items()},
+            "last_date": self.last_date,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.moments = {column: RunningMoments.from_dict(value) for column, value in data["moments"].items()}
+        stats.extremes = {column: RunningExtremes.from_dict(value) for column, value in data["extremes"].items()}
+        stats.quantiles = {column: [P2Quantile.from_dict(value) for value in values] for column, values in data["quantiles"].items()}
+        stats.last_date = data["last_date"]
+        return stats
+
+def save_stats(path, stats_by_farm):
+    """
+    Write a {farm_id: PrecipitationStats or TemperatureStats} dict to a JSON file.
+    """
+    Path(path).write_text(json.dumps({str(farm_id): stats.to_dict() for farm_id, stats in stats_by_farm.items()}))
+
+def load_stats(path, stats_class):
+    """
+    Read a file written by save_stats, or return an empty dict if it does not exist.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return {farm_id: stats_class.from_dict(data) for farm_id, data in json.loads(path.read_text()).items()}
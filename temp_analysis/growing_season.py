@@ -0,0 +1,99 @@
+import warnings
+import numpy as np
+import pandas as pd
+from precip_analysis.precip_analysis import farms_by_days
+
+# Days in the centered moving average used to smooth daily maximum temperatures
+SMOOTHING_WINDOW = 15
+# Years with fewer days of data than this get no season, since their midpoint is unreliable
+MIN_DAYS_PER_YEAR = 300
+
+def smooth_temperatures(values, window=SMOOTHING_WINDOW):
+    """
+    Centered moving average of a farms x days array, computed from prefix sums.
+    Missing days are skipped and the first and last days use a partial window.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    num_farms, num_days = values.shape
+    valid = ~np.isnan(values)
+    prefix_sum = np.zeros((num_farms, num_days + 1))
+    prefix_count = np.zeros((num_farms, num_days + 1))
+    np.cumsum(np.where(valid, values, 0.0), axis=1, out=prefix_sum[:, 1:])
+    np.cumsum(valid, axis=1, out=prefix_count[:, 1:])
+
+    half = window // 2
+    days = np.arange(num_days)
+    low = np.clip(days - half, 0, num_days)
+    high = np.clip(days + half + 1, 0, num_days)
+    sums = prefix_sum[:, high] - prefix_sum[:, low]
+    counts = prefix_count[:, high] - prefix_count[:, low]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def detect_growing_seasons(values, dates, farm_ids=None, smoothing_window=SMOOTHING_WINDOW, min_days=MIN_DAYS_PER_YEAR):
+    """
+    Detect the start and end of the warm growing season of every farm and year.
+    `values` is a farms x days array of daily maximum temperatures. The series is
+    smoothed, each year gets its own threshold halfway between that year's smoothed
+    maximum and minimum, and the season runs from the first day the smoothed series
+    rises above the threshold to the last day before it falls below it again.
+    Returns one row per farm and year: FarmId, Year, Threshold, SeasonStart,
+    SeasonEnd and SeasonLength, with NaT where no season was found.
+    """
+    smoothed = smooth_temperatures(values, smoothing_window)
+    num_farms = smoothed.shape[0]
+    dates = pd.DatetimeIndex(dates)
+    farm_ids = np.arange(num_farms) if farm_ids is None else np.asarray(farm_ids)
+    years = dates.year.to_numpy()
+
+    frames = []
+    for year in np.unique(years):
+        columns = np.nonzero(years == year)[0]
+        year_values = smoothed[:, columns]
+        with warnings.catch_warnings():
+            # Farms without any data this year are expected and give NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            threshold = (np.nanmax(year_values, axis=1) + np.nanmin(year_values, axis=1)) / 2
+
+        above = year_values >= threshold[:, None]
+        # rises[:, k]: day k is below and day k + 1 above; falls[:, k]: day k is above and day k + 1 below
+        rises = ~above[:, :-1] & above[:, 1:]
+        falls = above[:, :-1] & ~above[:, 1:]
+        if rises.shape[1] == 0:
+            # A year with a single day (a range ending on 1 January) has no crossings
+            start = end = np.zeros(num_farms, dtype=np.int64)
+        else:
+            start = rises.argmax(axis=1) + 1
+            falls &= np.arange(falls.shape[1]) >= start[:, None]
+            end = falls.shape[1] - 1 - falls[:, ::-1].argmax(axis=1)
+
+        enough_data = (~np.isnan(year_values)).sum(axis=1) >= min_days
+        found = enough_data & rises.any(axis=1) & falls.any(axis=1)
+        year_dates = dates[columns]
+        season_start = pd.DatetimeIndex(np.where(found, year_dates[start], np.datetime64("NaT")))
+        season_end = pd.DatetimeIndex(np.where(found, year_dates[end], np.datetime64("NaT")))
+        frames.append(pd.DataFrame({
+            'FarmId': farm_ids,
+            'Year': year,
+            'Threshold': np.where(enough_data, threshold, np.nan),
+            'SeasonStart': season_start,
+            'SeasonEnd': season_end,
+            'SeasonLength': (season_end - season_start).days + 1,
+        }))
+
+    return pd.concat(frames, ignore_index=True)
+
+def detect_growing_seasons_frame(data, smoothing_window=SMOOTHING_WINDOW, min_days=MIN_DAYS_PER_YEAR):
+    """
+    Run detect_growing_seasons over a weather DataFrame with Date and TemperatureMax
+    columns, for one farm or for a long-format frame with a FarmId column.
+    """
+    if 'FarmId' in data.columns:
+        farm_ids, dates, values = farms_by_days(data, 'TemperatureMax')
+    else:
+        farm_ids, dates, values = None, pd.DatetimeIndex(pd.to_datetime(data['Date'])), data['TemperatureMax'].to_numpy()
+    # The smoothing window counts positions, so days missing from the data become NaN columns
+    all_dates = pd.date_range(dates.min(), dates.max(), freq="D")
+    daily_values = np.full((np.atleast_2d(values).shape[0], len(all_dates)), np.nan)
+    daily_values[:, all_dates.get_indexer(dates)] = values
+    return detect_growing_seasons(daily_values, all_dates, farm_ids, smoothing_window, min_days)
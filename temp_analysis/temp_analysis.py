@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from precip_analysis.precip_analysis import farms_by_days
 # import matplotlib.pyplot as plt
 # import matplotlib.dates as mdates
 
@@ -6,6 +8,7 @@ class TemperatureAnalyzer:
     def __init__(self, weather_df):
         """
         Initialize the TemperatureAnalyzer with a DataFrame of weather data.
+        The analyzer only reads the DataFrame, so it can be shared with other stages.
         """
         self.weather_df = weather_df
 
@@ -20,10 +23,11 @@ class TemperatureAnalyzer:
 
     def calculate_daily_range(self):
         """
-        Calculate the daily temperature range and add it to the DataFrame.
+        Calculate the daily temperature range as a new DataFrame.
+        The weather DataFrame itself is not changed.
         """
-        self.weather_df['DailyRange'] = self.weather_df['TemperatureMax'] - self.weather_df['TemperatureMin']
-        return self.weather_df[['Date', 'DailyRange']]
+        daily_range = self.weather_df['TemperatureMax'] - self.weather_df['TemperatureMin']
+        return pd.DataFrame({'Date': self.weather_df['Date'], 'DailyRange': daily_range})
 
     def detect_extreme_temperatures(self, threshold=35, heat=True):
     # def detect_extreme_temperatures(self, heatwave_threshold=35, cold_snap_threshold=5, heat=True):
@@ -40,6 +44,55 @@ class TemperatureAnalyzer:
         
         return extreme_days
 
+
+def detect_extreme_events(values, threshold=35, heat=True, min_duration=1, dates=None, farm_ids=None):
+    """
+    Find contiguous heatwave (above threshold) or cold snap (below threshold)
+    episodes in a farms x days array in one vectorized pass.
+    Returns a run-length encoded table with one row per episode of at least
+    `min_duration` days: FarmId, Start, End (inclusive), Length and Peak.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    num_farms, num_days = values.shape
+    # NaN compares as False, so missing days end an episode
+    extreme = values > threshold if heat else values < threshold
+
+    # Pad with a False day on both sides so every episode has a start and an end edge
+    padded = np.zeros((num_farms, num_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = extreme
+    edges = np.diff(padded, axis=1)
+    farm_index, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    lengths = ends - starts
+
+    keep = lengths >= min_duration
+    farm_index, starts, ends, lengths = farm_index[keep], starts[keep], ends[keep], lengths[keep]
+
+    # Peak of each episode with one reduceat over the flattened array
+    flat = np.append(values.ravel(), np.nan)
+    bounds = np.column_stack([farm_index * num_days + starts, farm_index * num_days + ends]).ravel()
+    reducer = np.maximum if heat else np.minimum
+    peaks = reducer.reduceat(flat, bounds)[::2] if len(bounds) else np.array([])
+
+    farm_ids = np.arange(num_farms) if farm_ids is None else np.asarray(farm_ids)
+    dates = np.arange(num_days) if dates is None else np.asarray(dates)
+    return pd.DataFrame({
+        'FarmId': farm_ids[farm_index],
+        'Start': dates[starts],
+        'End': dates[ends - 1],
+        'Length': lengths,
+        'Peak': peaks,
+    })
+
+def detect_extreme_events_frame(data, threshold=35, heat=True, min_duration=1):
+    """
+    Run detect_extreme_events over a long-format frame (FarmId, Date, TemperatureMax,
+    TemperatureMin), using TemperatureMax for heatwaves and TemperatureMin for cold snaps.
+    """
+    column = 'TemperatureMax' if heat else 'TemperatureMin'
+    farm_ids, dates, values = farms_by_days(data, column)
+    return detect_extreme_events(values, threshold, heat, min_duration, dates, farm_ids)
+
 def run_full_analysis(daily_weather_df):
     """
     Perform a full temperature analysis, including descriptive statistics,
@@ -1,5 +1,29 @@
 import pytest
-from project import weatherData, get_farm_input, locationData, precipitation_data_avg
+from project import weatherData, get_farm_input, locationData, precipitation_data_avg, batchWeatherData, weatherPipeline, process_daily_response, headless_main, cli_main, fetch_weather_data
+import numpy as np
+import threading
+import time
+from fetch_scheduler.fetch_scheduler import FetchScheduler, TokenBucket, override_buckets, get_bucket
+from weather_store.weather_store import WeatherStore
+from http_session.http_session import get_session, close_sessions
+import responses
+import requests
+from geo_lookup.geo_lookup import GeocodeIndex, OfflineResolver
+import json
+from weather_archive.weather_archive import WeatherArchive
+from weather_export.weather_export import export_partitioned, StreamingWriter
+from farm_runner import farm_runner
+from benchmarks import benchmarks
+import subprocess
+from temp_analysis.temp_analysis import TemperatureAnalyzer, detect_extreme_events, detect_extreme_events_frame
+from temp_analysis.growing_season import detect_growing_seasons, detect_growing_seasons_frame
+from streaming_stats.streaming_stats import PrecipitationStats, TemperatureStats, save_stats, load_stats
+from request_coalescer.request_coalescer import RequestCoalescer
+from run_metrics.run_metrics import RunMetrics, track_session
+from standin_server.standin_server import StandInServer, run_load_test
+from region_analysis import region_analysis
+from climatology import climatology
+from precip_analysis.precip_analysis import rolling_precipitation, rolling_precipitation_frame
 import pandas as pd
 from unittest.mock import patch, MagicMock
 from pathlib import Path
@@ -85,10 +109,11 @@ def test_boundary_coordinates(mock_input, mock_geocoder, default_values):
     assert result['latitude'] == default_values["boundary_latlng"][0]
     assert result['longitude'] == default_values["boundary_latlng"][1]
 
-class testLocationData:
+class TestLocationData:
     # test the locationDate class
-    @patch('requests.get')
-    def test_get_location_data(self, mock_get, sample_inputs, location_mock_response):
+    @patch('project.get_session')
+    def test_get_location_data(self, mock_get_session, sample_inputs, location_mock_response):
+        mock_get = mock_get_session.return_value.get
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = location_mock_response
 
@@ -98,19 +123,43 @@ class testLocationData:
         assert result == location_mock_response
         mock_get.assert_called_once_with(f"https://json.geoapi.pt/gps/{sample_inputs['latitude']},{sample_inputs['longitude']}")
 
-    @patch('requests.get')
-    def test_get_freguesia(self, mock_get, sample_inputs, location_mock_response):
+    @patch('project.get_session')
+    def test_get_municipality(self, mock_get_session, sample_inputs, location_mock_response):
+        mock_get = mock_get_session.return_value.get
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = location_mock_response
 
         location = locationData(sample_inputs)
-        result = location.get_freguesia()
+        result = location.get_municipality()
 
-        assert result == 'Marvila'
+        assert result == 'Lisboa'
 
-    @patch('requests.get')
-    def test_get_location_data_error(self, mock_get, sample_inputs):
-        mock_get.return_value.status_code = 404
+    @patch('project.get_session')
+    def test_get_municipality_from_geocode_index(self, mock_get_session, location_mock_response):
+        mock_get = mock_get_session.return_value.get
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.side_effect = [
+            {**location_mock_response, 'freguesia': 'Marvila'},
+            {**location_mock_response, 'freguesia': 'Olivais'},
+        ]
+        index = GeocodeIndex()
+        marvila = {'latitude': 38.7484, 'longitude': -9.1030}
+        olivais = {'latitude': 38.7450, 'longitude': -9.1010}
+
+        assert locationData(marvila, geocode_index=index).get_municipality() == 'Lisboa'
+        # A point in the same 1.2 km cell is not answered from a single earlier point
+        assert locationData(olivais, geocode_index=index).get_municipality() == 'Lisboa'
+        assert mock_get.call_count == 2
+        assert index.lookup(**olivais)['freguesia'] == 'Olivais'
+        assert index.lookup(**marvila)['freguesia'] == 'Marvila'
+
+        # A point in the finest cell of an earlier answer needs no request
+        assert locationData({'latitude': 38.748406, 'longitude': -9.102984}, geocode_index=index).get_municipality() == 'Lisboa'
+        assert mock_get.call_count == 2
+
+    @patch('project.get_session')
+    def test_get_location_data_error(self, mock_get_session, sample_inputs):
+        mock_get_session.return_value.get.return_value.status_code = 404
 
         location = locationData(sample_inputs)
         result = location.get_location_data()
@@ -361,6 +410,818 @@ def location_mock_response():
                  "CP":"1950-449"}
 
 
+# Build a fake Open-Meteo response with the same methods as the real FlatBuffer object
+def make_daily_response(start_date, temperature_max, temperature_min, precipitation):
+    start = int(pd.Timestamp(start_date, tz="UTC").timestamp())
+    daily = MagicMock()
+    daily.Time.return_value = start
+    daily.TimeEnd.return_value = start + 86400 * len(temperature_max)
+    daily.Interval.return_value = 86400
+    values = [temperature_max, temperature_min, precipitation]
+    daily.Variables.side_effect = lambda i: MagicMock(ValuesAsNumpy=lambda: np.asarray(values[i], dtype=np.float32))
+    return MagicMock(Daily=lambda: daily)
+
+# Test that the batch mode groups farms into multi-location requests
+@patch("project.openmeteo_requests.Client")
+def test_batch_weather_data(mock_client):
+    farms = pd.DataFrame({
+        "farm_id": ["a", "b", "c"],
+        "latitude": [39.4, 38.7, 41.1],
+        "longitude": [-8.2, -9.1, -8.6],
+        "start_date": ["2025-01-01", "2025-01-01", "2025-01-01"],
+        "end_date": ["2025-01-02", "2025-01-02", "2025-01-02"],
+    })
+    mock_client.return_value.weather_api.side_effect = [
+        [make_daily_response("2025-01-01", [13.5, 14.8], [4.0, 1.9], [0.0, 1.2]),
+         make_daily_response("2025-01-01", [15.0, 16.0], [5.0, 6.0], [0.0, 0.0])],
+        [make_daily_response("2025-01-01", [10.0, 11.0], [2.0, 3.0], [4.5, 0.3])],
+    ]
+
+    result = batchWeatherData(farms, batch_size=2).get_weather_data()
+
+    # Three farms in batches of two means two API requests
+    assert mock_client.return_value.weather_api.call_count == 2
+    first_params = mock_client.return_value.weather_api.call_args_list[0][1]["params"]
+    assert first_params["latitude"] == "39.4,38.7"
+    assert list(result.columns) == ['FarmId', 'Date', 'TemperatureMax', 'TemperatureMin', 'Precipitation']
+    assert len(result) == 6
+    farm_c = result[result['FarmId'] == "c"].reset_index(drop=True)
+    assert farm_c['Date'].tolist() == ["2025-01-01", "2025-01-02"]
+    assert farm_c['Precipitation'].tolist() == [4.5, 0.3]
+
+# Test that the scheduler never runs more tasks at once than its cap
+def test_fetch_scheduler_concurrency_cap():
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fake_fetch(item):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return item * 2
+
+    with FetchScheduler(max_workers=3, rate_limits={}) as scheduler:
+        results = scheduler.map(fake_fetch, range(12))
+        # A limit the scheduler has no bucket for is not rate limited
+        limited = scheduler.map(fake_fetch, range(3), limit="geoapi")
+
+    assert results == [item * 2 for item in range(12)]
+    assert limited == [0, 2, 4]
+    assert state["peak"] == 3
+
+# Test that the token bucket waits once the burst capacity is used up
+def test_token_bucket_rate_limit():
+    clock = {"now": 0.0}
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: clock["now"], sleep=fake_sleep)
+    for _ in range(4):
+        bucket.acquire()
+
+    # Two tokens are free, the next two cost half a second each
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert clock["now"] == pytest.approx(1.0)
+
+# Test that every Open-Meteo request, including each chunk of a long range, takes a
+# token from one bucket shared by all schedulers
+@patch("project.openmeteo_requests.Client")
+def test_rate_limit_is_process_wide(mock_client):
+    def fake_weather_api(url, params):
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [make_daily_response(str(params["start_date"]), [20.0] * days, [10.0] * days, [1.0] * days)]
+
+    class CountingBucket:
+        def __init__(self):
+            self.tokens = 0
+            self.lock = threading.Lock()
+
+        def acquire(self):
+            with self.lock:
+                self.tokens += 1
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    farms = [
+        {"latitude": 39.4, "longitude": -8.2, "start_date": "2022-01-01", "end_date": "2024-12-31"},
+        {"latitude": 41.15, "longitude": -8.61, "start_date": "2022-01-01", "end_date": "2024-12-31"},
+    ]
+    bucket = CountingBucket()
+    with override_buckets({"open-meteo": bucket}):
+        fetch_weather_data(farms)
+    # Two farms of three year-sized chunks each
+    assert mock_client.return_value.weather_api.call_count == 6
+    assert bucket.tokens == 6
+
+# Test that a stored history is reused and only missing days are downloaded
+@patch("project.openmeteo_requests.Client")
+def test_weather_store_incremental_backfill(mock_client, tmp_path):
+    store = WeatherStore(tmp_path)
+    inputs = {"latitude": 39.3999, "longitude": -8.2245, "start_date": "2024-12-30"}
+    weather = weatherData(inputs, store=store)
+    weather.end_date = pd.Timestamp("2025-01-02").date()
+
+    # 2024-12-30 and 2024-12-31 are already stored, in the 2024 partition
+    store.write(39.3999, -8.2245, pd.DataFrame({
+        "Date": ["2024-12-30", "2024-12-31"],
+        "TemperatureMax": [12.0, 12.5],
+        "TemperatureMin": [3.0, 3.5],
+        "Precipitation": [0.0, 2.0],
+    }))
+    mock_client.return_value.weather_api.return_value = [
+        make_daily_response("2025-01-01", [13.5, 14.8], [4.0, 1.9], [0.0, 1.2])
+    ]
+
+    result = weather.get_weather_data()
+
+    # Only the two new days were requested
+    params = mock_client.return_value.weather_api.call_args[1]["params"]
+    assert str(params["start_date"]) == "2025-01-01"
+    assert str(params["end_date"]) == "2025-01-02"
+    assert result["Date"].tolist() == ["2024-12-30", "2024-12-31", "2025-01-01", "2025-01-02"]
+    assert result["Precipitation"].tolist() == [0.0, 2.0, 0.0, 1.2]
+    assert (tmp_path / "cell=39.40_-8.22" / "2025.parquet").exists()
+
+def _write_store_rows(root, first_day):
+    days = pd.date_range("2024-01-01", periods=120)[first_day::4].strftime("%Y-%m-%d")
+    WeatherStore(root).write(39.4, -8.2, pd.DataFrame({"Date": days, "Precipitation": float(first_day)}))
+
+# Test that processes writing the same partition at once keep every row
+def test_weather_store_concurrent_writes(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_write_store_rows, [tmp_path] * 4, range(4)))
+    stored = WeatherStore(tmp_path).read(39.4, -8.2, "2024-01-01", "2024-12-31")
+    assert len(stored) == 120
+    assert not list((tmp_path / "cell=39.40_-8.20").glob("*.tmp"))
+
+# Test that every caller shares one session and repeated geocoding is served from the cache
+@responses.activate
+def test_shared_session_caches_geocoding(tmp_path, location_mock_response):
+    url = "https://json.geoapi.pt/gps/38.748406,-9.102984"
+    responses.add(responses.GET, url, json=location_mock_response)
+    cache_name = str(tmp_path / "cache")
+    try:
+        session = get_session(cache_name)
+        assert get_session(cache_name) is session
+
+        first = session.get(url)
+        second = session.get(url)
+
+        assert not first.from_cache
+        assert second.from_cache
+        assert len(responses.calls) == 1
+        assert session.get_adapter("https://").max_retries.total == 5
+    finally:
+        close_sessions()
+
+# Test that conflicting answers split a cell so both areas are kept
+def test_geocode_index_splits_on_conflict(tmp_path):
+    index = GeocodeIndex(min_precision=5, max_precision=7)
+    index.add(38.7484, -9.1030, {"distrito": "Lisboa", "concelho": "Lisboa", "freguesia": "Marvila"})
+    index.add(38.7400, -9.1100, {"distrito": "Lisboa", "concelho": "Lisboa", "freguesia": "Olivais"})
+
+    assert index.lookup(38.7484, -9.1030)["freguesia"] == "Marvila"
+    assert index.lookup(38.7400, -9.1100)["freguesia"] == "Olivais"
+    # Both points share a precision-5 cell, which is now split
+    assert index.cells["eycs2"] is None
+    # A point far from both is unknown
+    assert index.lookup(41.15, -8.61) is None
+
+    # A coarse cell answers new points only after enough points in it agreed
+    porto = {"distrito": "Porto", "concelho": "Porto", "freguesia": "Bonfim"}
+    for latitude, longitude in [(41.1500, -8.6000), (41.1510, -8.6010), (41.1490, -8.5990)]:
+        assert index.lookup(41.1520, -8.5980) is None
+        index.add(latitude, longitude, porto)
+    assert index.lookup(41.1520, -8.5980) == porto
+
+    index.save(tmp_path / "index.json")
+    loaded = GeocodeIndex.load(tmp_path / "index.json")
+    assert loaded.lookup(38.7400, -9.1100)["freguesia"] == "Olivais"
+
+# Test the offline resolver against a small boundary file
+@pytest.fixture
+def boundaries_file(tmp_path):
+    square = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+    hole = [[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6], [0.4, 0.4]]
+    east = [[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]
+    features = [
+        {"type": "Feature",
+         "properties": {"Distrito": "D1", "Concelho": "West", "Freguesia": "W1"},
+         "geometry": {"type": "Polygon", "coordinates": [square, hole]}},
+        {"type": "Feature",
+         "properties": {"Distrito": "D1", "Concelho": "East", "Freguesia": "E1"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [[east]]}},
+    ]
+    path = tmp_path / "boundaries.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return path
+
+def test_offline_resolver(boundaries_file):
+    resolver = OfflineResolver(boundaries_file, grid_size=0.25)
+
+    result = resolver.resolve_many([0.2, 0.5, 0.5, 0.9, 3.0], [0.2, 0.5, 1.5, 1.9, 3.0])
+    # Inside West, inside West's hole, inside East, inside East, outside everything
+    assert result.tolist() == [0, -1, 1, 1, -1]
+    assert resolver.resolve(0.5, 1.5) == {"distrito": "D1", "concelho": "East", "freguesia": "E1"}
+
+    with patch("project.get_session") as mock_get_session:
+        location = locationData({"latitude": 0.2, "longitude": 0.2}, resolver=resolver)
+        assert location.get_municipality() == "West"
+        outside = locationData({"latitude": 3.0, "longitude": 3.0}, resolver=resolver)
+        assert outside.get_location_data() == "Error: location outside known boundaries"
+    # Offline lookups never open the HTTP session
+    mock_get_session.assert_not_called()
+
+# Test that the pipeline fetches once and every product reuses that result
+def test_weather_pipeline_fetches_once(tmp_path):
+    weather = MagicMock()
+    weather.get_weather_data.return_value = pd.DataFrame({
+        "Date": ["2025-01-01", "2025-01-02", "2025-01-03"],
+        "TemperatureMax": [13.5, 14.8, 14.6],
+        "TemperatureMin": [4.0, 1.9, 3.4],
+        "Precipitation": [0.0, 3.0, 1.5],
+    })
+    pipeline = weatherPipeline(weather)
+
+    assert pipeline.precipitation_df['Rolling_Average'].tolist() == pytest.approx([0.0, 1.5, 1.5])
+    assert pipeline.precipitation_stats['max_precipitation'][0] == 3.0
+    output_files = pipeline.export_all(tmp_path)
+
+    weather.get_weather_data.assert_called_once()
+    assert len(output_files) == 4
+    assert all(path.exists() for path in output_files)
+    # The shared weather frame was not changed by the derived products
+    assert list(pipeline.weather_df.columns) == ["Date", "TemperatureMax", "TemperatureMin", "Precipitation"]
+
+# Test that the fast decode mode keeps datetime64 dates and the API's float32 arrays
+def test_fast_decode_keeps_native_types():
+    temperature_max = np.array([13.5, 14.8, 14.6], dtype=np.float32)
+    response = make_daily_response("2025-01-01", temperature_max, [4.0, 1.9, 3.4], [0.0, 0.2, 0.0])
+
+    fast = process_daily_response(response, fast=True)
+    assert pd.api.types.is_datetime64_any_dtype(fast['Date'])
+    assert fast['TemperatureMax'].dtype == np.float32
+    assert np.shares_memory(fast['TemperatureMax'].to_numpy(), temperature_max)
+
+    # The default mode still returns formatted strings and rounded float64 values
+    formatted = process_daily_response(response)
+    assert formatted['Date'].tolist() == ["2025-01-01", "2025-01-02", "2025-01-03"]
+    assert formatted['TemperatureMax'].dtype == np.float64
+    assert formatted['Precipitation'].tolist() == [0.0, 0.2, 0.0]
+
+    # Rows where every value is missing are dropped in both modes
+    missing_day = make_daily_response("2025-01-01", [13.5, np.nan], [4.0, np.nan], [0.0, np.nan])
+    assert len(process_daily_response(missing_day, fast=True)) == 1
+
+# Build a fake hourly Open-Meteo response with one array per requested variable
+def make_hourly_response(start_date, values):
+    start = int(pd.Timestamp(start_date, tz="UTC").timestamp())
+    hourly = MagicMock()
+    hourly.Time.return_value = start
+    hourly.TimeEnd.return_value = start + 3600 * len(values[0])
+    hourly.Interval.return_value = 3600
+    hourly.Variables.side_effect = lambda i: MagicMock(ValuesAsNumpy=lambda: np.asarray(values[i], dtype=np.float32))
+    return MagicMock(Hourly=lambda: hourly)
+
+# Test that hourly data is requested in chunks and reduced to daily and weekly values
+@patch("project.openmeteo_requests.Client")
+def test_hourly_aggregates(mock_client, user_inputs):
+    aggregations = {"temperature_2m": ["mean", "max"], "et0_fao_evapotranspiration": ["sum"]}
+
+    def fake_weather_api(url, params):
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        temperature = np.tile(np.arange(24), days)
+        evapotranspiration = np.full(24 * days, 0.1)
+        return [make_hourly_response(params["start_date"], [temperature, evapotranspiration])]
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    weather = weatherData(user_inputs)
+    weather.end_date = pd.Timestamp("2025-01-10").date()
+
+    daily, weekly = weather.get_hourly_aggregates(aggregations, chunk_days=4)
+
+    # Ten days in chunks of four days means three requests
+    assert mock_client.return_value.weather_api.call_count == 3
+    assert list(daily.columns) == ["Date", "temperature_2m_mean", "temperature_2m_max", "et0_fao_evapotranspiration_sum"]
+    assert len(daily) == 10
+    assert daily["temperature_2m_mean"].tolist() == pytest.approx([11.5] * 10)
+    assert daily["et0_fao_evapotranspiration_sum"].tolist() == pytest.approx([2.4] * 10)
+    # 2025-01-05 and 2025-01-12 are Sundays, so the first week has five days
+    assert weekly["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-01-05", "2025-01-12"]
+    assert weekly["et0_fao_evapotranspiration_sum"].tolist() == pytest.approx([12.0, 12.0])
+    assert weekly["temperature_2m_max"].tolist() == [23.0, 23.0]
+
+# Test the vectorized rolling engine against pandas rolling for every window and stat
+def test_rolling_precipitation_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.gamma(0.5, 3.0, size=(5, 120))
+    values[rng.random(values.shape) < 0.1] = np.nan
+
+    results = rolling_precipitation(values)
+
+    for window in (3, 7, 30, 90):
+        series = pd.DataFrame(values.T).rolling(window=window, min_periods=1)
+        for stat in ("mean", "sum", "max"):
+            expected = getattr(series, stat)().to_numpy().T
+            np.testing.assert_allclose(results[(stat, window)], expected, equal_nan=True)
+
+def test_rolling_precipitation_frame():
+    data = pd.DataFrame({
+        "FarmId": ["a"] * 4 + ["b"] * 4,
+        "Date": list(pd.date_range("2025-01-01", periods=4)) * 2,
+        "Precipitation": [1.0, 2.0, 3.0, 4.0, 0.0, 0.0, 6.0, 0.0],
+    })
+
+    result = rolling_precipitation_frame(data, windows=(3,), stats=("sum", "max"))
+
+    farm_b = result[result["FarmId"] == "b"]
+    assert farm_b["Rolling_Sum_3"].tolist() == [0.0, 0.0, 6.0, 6.0]
+    assert farm_b["Rolling_Max_3"].tolist() == [0.0, 0.0, 6.0, 6.0]
+    assert result[result["FarmId"] == "a"]["Rolling_Sum_3"].tolist() == [1.0, 3.0, 6.0, 9.0]
+
+# Test that the streaming stats match the batch stats and survive a save and load
+def test_streaming_stats_match_batch(tmp_path):
+    rng = np.random.default_rng(1)
+    days = 1000
+    data = pd.DataFrame({
+        "Date": pd.date_range("2020-01-01", periods=days).strftime("%Y-%m-%d"),
+        "TemperatureMax": rng.normal(22, 6, days).round(1),
+        "TemperatureMin": rng.normal(10, 5, days).round(1),
+        "Precipitation": rng.gamma(0.4, 4, days).round(1),
+    })
+    history, new_day = data.iloc[:-1], data.iloc[-1]
+
+    precipitation = PrecipitationStats(window=30)
+    precipitation.update_many(history)
+    temperature = TemperatureStats()
+    temperature.update_many(history)
+
+    # A daily job loads yesterday's state and adds one new day
+    save_stats(tmp_path / "precipitation.json", {"farm": precipitation})
+    save_stats(tmp_path / "temperature.json", {"farm": temperature})
+    precipitation = load_stats(tmp_path / "precipitation.json", PrecipitationStats)["farm"]
+    temperature = load_stats(tmp_path / "temperature.json", TemperatureStats)["farm"]
+    precipitation.update(new_day["Date"], new_day["Precipitation"])
+    temperature.update(new_day["Date"], new_day["TemperatureMax"], new_day["TemperatureMin"])
+
+    quick_stats = precipitation.quick_stats().iloc[0]
+    assert quick_stats["max_precipitation"] == data["Precipitation"].max()
+    assert quick_stats["day_most_rain"] == data.loc[data["Precipitation"].idxmax(), "Date"]
+    assert quick_stats["day_least_rain"] == data.loc[data["Precipitation"].idxmin(), "Date"]
+    assert quick_stats["rolling_average"] == pytest.approx(data["Precipitation"].rolling(30, min_periods=1).mean().iloc[-1])
+
+    described = temperature.describe()
+    expected = data[["TemperatureMax", "TemperatureMin"]].describe()
+    for row in ["count", "mean", "std", "min", "max"]:
+        assert described.loc[row].tolist() == pytest.approx(expected.loc[row].tolist())
+    # Quartiles are streaming estimates
+    for row in ["25%", "50%", "75%"]:
+        assert described.loc[row].tolist() == pytest.approx(expected.loc[row].tolist(), abs=0.5)
+
+    # Re-running the last day changes nothing
+    precipitation.update(new_day["Date"], 500.0)
+    temperature.update(new_day["Date"], 50.0, -20.0)
+    assert precipitation.quick_stats().iloc[0]["max_precipitation"] == data["Precipitation"].max()
+    assert temperature.describe().loc["count"].tolist() == [days, days]
+
+# Test that days skipped by a daily job are missing from the rolling window
+def test_streaming_stats_skipped_days():
+    stats = PrecipitationStats(window=3)
+    stats.update("2024-01-01", 3.0)
+    stats.update("2024-01-02", 6.0)
+    stats.update("2024-01-05", 9.0)
+    # 2024-01-03 and 2024-01-04 fill the window, so only the new day is left in it
+    assert stats.quick_stats().iloc[0]["rolling_average"] == 9.0
+    stats.update("2024-01-06", 3.0)
+    assert stats.quick_stats().iloc[0]["rolling_average"] == 6.0
+
+# Test that the analyses return new columns and leave the shared input frame unchanged
+def test_analyses_do_not_mutate_input():
+    data = pd.DataFrame({
+        'Date': ["2025-01-01", "2025-01-02", "2025-01-03"],
+        'TemperatureMax': [36.0, 20.0, 4.0],
+        'TemperatureMin': [20.0, 10.0, 1.0],
+        'Precipitation': [0.0, 2.0, 4.0],
+    })
+    original = data.copy()
+
+    precipitation = precipitation_data_avg(data)
+    analyzer = TemperatureAnalyzer(data)
+    daily_range = analyzer.calculate_daily_range()
+    with patch('builtins.print'):
+        heatwave_days = analyzer.detect_extreme_temperatures(35, True)
+
+    assert data.equals(original)
+    assert list(precipitation.columns) == ['Date', 'Precipitation', 'Rolling_Average']
+    assert pd.api.types.is_datetime64_any_dtype(precipitation['Date'])
+    assert daily_range['DailyRange'].tolist() == [16.0, 10.0, 3.0]
+    assert heatwave_days['Date'].tolist() == ["2025-01-01"]
+
+# Test that heatwave and cold snap episodes are found and run-length encoded
+def test_detect_extreme_events():
+    values = np.array([
+        [36, 37, 20, 40, np.nan, 41, 42, 43],
+        [30, 30, 30, 30, 30, 30, 30, 36],
+    ])
+
+    heatwaves = detect_extreme_events(values, threshold=35, heat=True, min_duration=2)
+
+    # The single hot day of farm 0 and of farm 1 are too short, and NaN ends an episode
+    assert heatwaves.to_dict("list") == {
+        "FarmId": [0, 0], "Start": [0, 5], "End": [1, 7], "Length": [2, 3], "Peak": [37.0, 43.0],
+    }
+
+    data = pd.DataFrame({
+        "FarmId": ["a"] * 4,
+        "Date": pd.date_range("2025-01-01", periods=4),
+        "TemperatureMax": [10.0, 10.0, 10.0, 10.0],
+        "TemperatureMin": [6.0, 2.0, -1.0, 3.0],
+    })
+    cold_snaps = detect_extreme_events_frame(data, threshold=5, heat=False)
+    assert len(cold_snaps) == 1
+    assert cold_snaps["Start"][0] == pd.Timestamp("2025-01-02")
+    assert cold_snaps["End"][0] == pd.Timestamp("2025-01-04")
+    assert cold_snaps["Peak"][0] == -1.0
+
+# Test growing season detection on a smooth yearly temperature cycle
+def test_detect_growing_seasons():
+    dates = pd.date_range("2023-01-01", "2024-12-31")
+    day_of_year = dates.dayofyear.to_numpy()
+    # Coldest around mid January, warmest around mid July, so the midpoint is crossed in mid April and mid October
+    cycle = 20 - 8 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    values = np.vstack([cycle, cycle + 5])
+
+    seasons = detect_growing_seasons(values, dates, farm_ids=["a", "b"])
+
+    assert len(seasons) == 4
+    assert seasons["Threshold"].tolist() == pytest.approx([20, 25, 20, 25], abs=0.1)
+    for start, end in zip(seasons["SeasonStart"], seasons["SeasonEnd"]):
+        assert start.month == 4
+        assert end.month == 10
+    assert seasons["SeasonLength"].between(180, 190).all()
+
+    # A year with too little data gets no season
+    single_farm = pd.DataFrame({"Date": dates[:400].strftime("%Y-%m-%d"), "TemperatureMax": cycle[:400]})
+    seasons = detect_growing_seasons_frame(single_farm)
+    assert seasons["SeasonStart"].notna().tolist() == [True, False]
+
+    # A range ending on 1 January gives that year a single day and no season
+    seasons = detect_growing_seasons_frame(single_farm.iloc[:366])
+    assert seasons["Year"].tolist() == [2023, 2024]
+    assert seasons["SeasonStart"].notna().tolist() == [True, False]
+
+    # Days dropped from the data are missing days, not a shorter smoothing window
+    gappy = single_farm.iloc[:365].drop(index=range(100, 130))
+    expected = detect_growing_seasons(np.where((np.arange(365) >= 100) & (np.arange(365) < 130), np.nan, cycle[:365]), dates[:365])
+    assert detect_growing_seasons_frame(gappy)["SeasonStart"].tolist() == expected["SeasonStart"].tolist()
+
+# Test that importing project.py does not load the GUI toolkit or the heavy libraries
+def test_import_is_lazy():
+    code = (
+        "import sys, project; "
+        "print([name for name in ('tkinter', 'pandas.core', 'openmeteo_requests.Client', 'requests_cache') if name in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+# Test the headless entry point end to end with a mocked API
+@patch("project.openmeteo_requests.Client")
+def test_headless_main(mock_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock_client.return_value.weather_api.return_value = [
+        make_daily_response("2025-01-01", [13.5, 14.8, 14.6], [4.0, 1.9, 3.4], [0.0, 0.0, 2.0])
+    ]
+
+    with patch("builtins.print") as mock_print:
+        headless_main(["--latitude", "39.4", "--longitude", "-8.2", "--start-date", "2025-01-01",
+                       "--end-date", "2025-01-03", "--output-dir", str(tmp_path / "out")])
+
+    assert len(list((tmp_path / "out").glob("*.csv"))) == 4
+    assert "Startup took" in str(mock_print.call_args_list)
+    params = mock_client.return_value.weather_api.call_args[1]["params"]
+    assert str(params["end_date"]) == "2025-01-03"
+
+    # Without a location the command line runs the interactive tool, which can be profiled too
+    with patch("project.main") as mock_main:
+        cli_main(["--profile=report.txt"])
+    mock_main.assert_called_once_with(profile_path="report.txt")
+    with pytest.raises(SystemExit), patch("sys.stderr"):
+        cli_main(["--latitude", "39.4", "--longitude", "-8.2"])
+    with pytest.raises(SystemExit), patch("sys.stderr"):
+        cli_main(["--output-dir", "out"])
+
+# Test the scheduled-job runner on a farms file, in process so the API mock applies
+@patch("project.openmeteo_requests.Client")
+def test_farm_runner(mock_client, tmp_path):
+    farms_file = tmp_path / "farms.csv"
+    pd.DataFrame({"farm_id": [1, 2], "latitude": [39.4, 38.7], "longitude": [-8.2, -9.1]}).to_csv(farms_file, index=False)
+    mock_client.return_value.weather_api.side_effect = [
+        [make_daily_response("2025-01-01", [13.5, 14.8], [4.0, 1.9], [0.0, 1.2])],
+        Exception("API unavailable"),
+    ]
+
+    with patch("builtins.print") as mock_print, override_buckets({"open-meteo": None}):
+        exit_code = farm_runner.main([
+            "--farms", str(farms_file), "--start-date", "2025-01-01", "--end-date", "2025-01-02",
+            "--output-dir", str(tmp_path / "out"), "--workers", "1", "--store-dir", str(tmp_path / "store"),
+        ])
+        # An in-process run leaves the caller's buckets in place
+        assert get_bucket("open-meteo") is None
+
+    printed = str(mock_print.call_args_list)
+    assert exit_code == 1
+    assert "farms per second" in printed
+    assert "Farm 2 failed: API unavailable" in printed
+    assert len(list((tmp_path / "out" / "1").glob("*.csv"))) == 4
+
+    # A worker's share of the rate limit becomes the bucket every request in it draws from
+    with override_buckets({"open-meteo": None}):
+        farm_runner._init_worker(2.5)
+        assert get_bucket("open-meteo").rate == 2.5
+
+# Test the partitioned and streaming Parquet/Feather exports
+def test_partitioned_and_streaming_export(tmp_path):
+    data = pd.DataFrame({
+        "FarmId": ["a", "a", "b"],
+        "Date": ["2024-12-31", "2025-01-01", "2025-01-01"],
+        "TemperatureMax": [12.0, 13.5, 15.0],
+        "TemperatureMin": [3.0, 4.0, 5.0],
+        "Precipitation": [0.0, 1.2, 0.0],
+    })
+
+    export_partitioned(data, tmp_path / "parquet")
+    export_partitioned(data, tmp_path / "feather", format="feather", compression=None)
+
+    assert (tmp_path / "parquet" / "FarmId=a" / "Year=2024" / "part-0.parquet").exists()
+    assert (tmp_path / "feather" / "FarmId=b" / "Year=2025" / "part-0.feather").exists()
+    farm_a_2025 = pd.read_parquet(tmp_path / "parquet" / "FarmId=a" / "Year=2025")
+    assert farm_a_2025["TemperatureMax"].tolist() == [13.5]
+
+    with StreamingWriter(tmp_path / "stream", format="feather") as writer:
+        for farm_id, chunk in data.groupby("FarmId"):
+            writer.write(chunk)
+    assert pd.read_feather(tmp_path / "stream.feather").equals(data)
+
+# Test that the archive serves memory-mapped arrays and frames the analyses can use
+def test_weather_archive(tmp_path):
+    store = WeatherStore(tmp_path / "store")
+    store.write(39.4, -8.2, pd.DataFrame({
+        "Date": ["2025-01-02", "2025-01-03"],
+        "TemperatureMax": [10.0, 11.0],
+        "TemperatureMin": [1.0, 2.0],
+        "Precipitation": [0.5, 1.0],
+    }))
+    farms = [{"farm_id": "a", "latitude": 39.4, "longitude": -8.2}, {"farm_id": "b", "latitude": 41.1, "longitude": -8.6}]
+    WeatherArchive.from_store(tmp_path / "archive", store, farms, "2025-01-01", "2025-01-04")
+
+    archive = WeatherArchive(tmp_path / "archive")
+    precipitation = archive.array("Precipitation")
+    assert isinstance(precipitation, np.memmap)
+    assert precipitation.shape == (2, 4)
+    np.testing.assert_array_equal(precipitation[0], [np.nan, 0.5, 1.0, np.nan])
+    assert np.isnan(precipitation[1]).all()
+    assert archive.array("Precipitation", farm_ids=[]).shape == (0, 4)
+
+    farm_a = archive.frame("a", "2025-01-02", "2025-01-03")
+    assert precipitation_data_avg(farm_a)["Rolling_Average"].tolist() == [0.5, 0.75]
+    assert TemperatureAnalyzer(farm_a).calculate_daily_range()["DailyRange"].tolist() == [9.0, 9.0]
+
+# Test that long ranges are fetched in chunks and a failed chunk only costs that chunk
+@patch("project.openmeteo_requests.Client")
+def test_chunked_fetch_of_long_range(mock_client, tmp_path):
+    requested = []
+    fail_once = {"2023-01-02"}
+
+    def fake_weather_api(url, params):
+        start = str(params["start_date"])
+        requested.append(start)
+        if start in fail_once:
+            fail_once.remove(start)
+            raise Exception("timeout")
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [make_daily_response(start, [20.0] * days, [10.0] * days, [1.0] * days)]
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    inputs = {"latitude": 39.4, "longitude": -8.2, "start_date": "2022-01-01", "end_date": "2024-12-31"}
+
+    # Without a store, the chunks are stitched together in date order
+    weather = weatherData({**inputs, "start_date": "2023-06-01"})
+    stitched = weather.get_weather_data()
+    assert len(stitched) == len(pd.date_range("2023-06-01", "2024-12-31"))
+    assert stitched["Date"].is_monotonic_increasing
+
+    requested.clear()
+    fail_once.add("2023-01-02")
+    store = WeatherStore(tmp_path)
+    with pytest.raises(Exception, match="timeout"):
+        weatherData(inputs, store=store).get_weather_data()
+    # Three year-sized chunks were requested and the two that worked were stored
+    assert sorted(requested) == ["2022-01-01", "2023-01-02", "2024-01-03"]
+
+    requested.clear()
+    result = weatherData(inputs, store=store).get_weather_data()
+    assert requested == ["2023-01-02"]
+    assert len(result) == len(pd.date_range("2022-01-01", "2024-12-31"))
+
+# Test that farms in one grid cell and concurrent identical requests share one download
+@patch("project.openmeteo_requests.Client")
+def test_request_coalescing(mock_client):
+    def fake_weather_api(url, params):
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [make_daily_response(str(params["start_date"]), [20.0] * days, [10.0] * days, [1.0] * days)]
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    farms = [
+        {"latitude": 39.401, "longitude": -8.201, "start_date": "2024-01-01", "end_date": "2024-01-20"},
+        {"latitude": 39.402, "longitude": -8.199, "start_date": "2024-01-10", "end_date": "2024-01-31"},
+        {"latitude": 41.150, "longitude": -8.610, "start_date": "2024-01-01", "end_date": "2024-01-05"},
+    ]
+    with FetchScheduler(max_workers=3, rate_limits={"open-meteo": 100}) as scheduler:
+        results = fetch_weather_data(farms, scheduler)
+    # The first two farms share one grid cell and their ranges merge into one request
+    assert mock_client.return_value.weather_api.call_count == 2
+    assert [len(result) for result in results] == [20, 22, 5]
+    assert results[1]["Date"].iloc[0] == "2024-01-10"
+
+    # A request covered by one already in flight waits for it instead of downloading
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        started.set()
+        release.wait(5)
+        return pd.DataFrame({"Date": pd.date_range(start_date, end_date), "Precipitation": 1.0})
+
+    owner = threading.Thread(target=coalescer.request, args=(39.401, -8.201, "2024-01-01", "2024-01-31", slow_fetch))
+    owner.start()
+    started.wait(5)
+    shared = coalescer.request(39.402, -8.199, "2024-01-05", "2024-01-06", slow_fetch)
+    release.set()
+    owner.join()
+    assert len(calls) == 1
+    assert len(shared.result(timeout=5)) == 2
+    assert (coalescer.fetches, coalescer.shared) == (1, 1)
+
+# Test that the benchmark suite runs offline and writes comparable JSON results
+def test_benchmarks_write_results(tmp_path):
+    output = tmp_path / "results.json"
+    with patch.dict(benchmarks.SCENARIOS, {"1-month": (1, 31), "1-year": (3, 20)}, clear=True):
+        benchmarks.main(["--output", str(output), "--repeat", "1"])
+
+    report = json.loads(output.read_text())
+    assert len(report["results"]) == 2 * len(benchmarks.STAGES)
+    first = report["results"][0]
+    assert (first["scenario"], first["stage"]) == ("1-month", "get_weather_data")
+    assert all(result["seconds"] > 0 and result["peak_memory_mb"] > 0 for result in report["results"])
+    comparison = benchmarks.compare_results(report, report)
+    assert (comparison["ratio"] == 1).all()
+
+# Test that runs report per-stage timings, cache counters and an optional profile
+@patch("project.openmeteo_requests.Client")
+def test_run_metrics(mock_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock_client.return_value.weather_api.return_value = [
+        make_daily_response("2025-01-01", [13.5, 14.8, 14.6], [4.0, 1.9, 3.4], [0.0, 0.0, 2.0])
+    ]
+    with patch("builtins.print") as mock_print:
+        headless_main(["--latitude", "39.4", "--longitude", "-8.2", "--start-date", "2025-01-01",
+                       "--end-date", "2025-01-03", "--output-dir", str(tmp_path / "out"),
+                       "--profile", str(tmp_path / "profile.txt")])
+    printed = str(mock_print.call_args_list)
+    for stage in ["open-meteo request", "dataframe cleaning", "weather store", "csv export"]:
+        assert stage in printed
+    assert "Peak traced memory" in (tmp_path / "profile.txt").read_text()
+
+    # Cache hits and misses are counted from the session's responses
+    import requests_cache
+    session = track_session(requests_cache.CachedSession(backend="memory"))
+    with RunMetrics() as metrics, responses.RequestsMock() as mock_api:
+        mock_api.add(responses.GET, "https://json.geoapi.pt/gps/39.4,-8.2", json={"concelho": "Abrantes"})
+        session.get("https://json.geoapi.pt/gps/39.4,-8.2")
+        session.get("https://json.geoapi.pt/gps/39.4,-8.2")
+    assert metrics.counters["cache hits"] == 1
+    assert metrics.counters["cache misses"] == 1
+    assert metrics.counters["bytes downloaded"] == len(b'{"concelho": "Abrantes"}')
+
+# Test the real clients against the local stand-in server, including its failure modes
+def test_standin_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with patch("project.get_session", lambda: requests.Session()), StandInServer() as server:
+        weather = weatherData({"latitude": 39.4, "longitude": -8.2, "start_date": "2024-01-01", "end_date": "2024-03-31"})
+        weather.url = server.weather_url
+        weather_df = weather.get_weather_data()
+        assert len(weather_df) == 91
+        assert (weather_df["TemperatureMax"] > weather_df["TemperatureMin"]).all()
+        daily, weekly = weather.get_hourly_aggregates()
+        assert len(daily) == 91
+        assert (daily["temperature_2m_min"] <= daily["temperature_2m_max"]).all()
+
+        location = locationData({"latitude": 39.4, "longitude": -8.2})
+        location.base_url = server.geoapi_url
+        assert isinstance(location.get_municipality(), str)
+
+        result = run_load_test(server, num_requests=20, workers=4, kind="location")
+        assert result["failures"] == 0
+        assert result["p50"] <= result["p99"]
+        assert not list(tmp_path.glob(".cache*"))
+
+        server.rate_limit_rate = 1.0
+        with pytest.raises(Exception, match="Too many concurrent requests"):
+            weather.get_weather_data()
+        assert server.counters["rate limited"] == 1
+
+# Test the gridded region mode from a concelho's boundaries to the summary rasters
+@patch("project.openmeteo_requests.Client")
+def test_region_analysis(mock_client, boundaries_file, tmp_path):
+    def fake_weather_api(url, params):
+        # Hotter cells further north, so every cell of the raster is different
+        return [make_daily_response(params["start_date"], [32 + 5 * float(lat)] * 4, [10.0] * 4, [0.0, 2.0, 0.0, 1.0])
+                for lat in params["latitude"].split(",")]
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    resolver = OfflineResolver(boundaries_file, grid_size=0.25)
+    latitudes, longitudes, mask = region_analysis.concelho_region(resolver, "West", resolution=0.2)
+    # The cell at the center of West falls in its hole
+    assert mask.shape == (5, 5)
+    assert mask.sum() == 24
+
+    cube = region_analysis.fetch_cube(latitudes, longitudes, "2025-01-01", "2025-01-04", mask, batch_size=10)
+    assert cube.shape == (5, 5, 4)
+    assert mock_client.return_value.weather_api.call_count == 3
+    rasters = region_analysis.summarize_cube(cube)
+    assert np.isnan(rasters["heat_days"][2, 2])
+    assert rasters["heat_days"][4, 0] == 4 and rasters["heat_days"][0, 0] == 0
+    assert rasters["heatwaves"][4, 0] == 1
+    assert rasters["precipitation_total"][0, 0] == pytest.approx(3.0)
+    assert rasters["rainy_days"][0, 0] == 2
+
+    paths = region_analysis.save_rasters(cube, rasters, tmp_path / "region")
+    assert (tmp_path / "region" / "heat_days.asc").read_text().startswith("ncols 5\nnrows 5\n")
+    assert len(pd.read_csv(paths[-1])) == 24
+
+    # A two-year range is requested in year-sized chunks that fill the whole cube
+    def fake_long_api(url, params):
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [make_daily_response(str(params["start_date"]), [20.0] * days, [10.0] * days, [1.0] * days)
+                for _ in params["latitude"].split(",")]
+
+    mock_client.reset_mock()
+    mock_client.return_value.weather_api.side_effect = fake_long_api
+    cube = region_analysis.fetch_cube([39.3, 39.5], [-8.2], "2023-01-01", "2024-12-31")
+    assert mock_client.return_value.weather_api.call_count == 2
+    assert [str(call[1]["params"]["start_date"]) for call in mock_client.return_value.weather_api.call_args_list] == ["2023-01-01", "2024-01-02"]
+    assert cube.shape == (2, 1, 731)
+    assert not np.isnan(cube.values["Precipitation"]).any()
+
+# Test that normals are cached and new data is compared with them by day of year
+@patch("project.openmeteo_requests.Client")
+def test_climatology_normals(mock_client, tmp_path):
+    def fake_weather_api(url, params):
+        assert url == climatology.ARCHIVE_URL
+        days = len(pd.date_range(params["start_date"], params["end_date"]))
+        return [make_daily_response(params["start_date"], [20.0] * days, [10.0] * days, [1.0] * days)]
+
+    mock_client.return_value.weather_api.side_effect = fake_weather_api
+    reference = ("2000-01-01", "2002-12-31")
+    cache = climatology.NormalsCache(tmp_path)
+    normals = cache.get(39.4, -8.2, reference)
+    assert mock_client.return_value.weather_api.call_count == 3
+    assert len(normals) == 366
+    assert normals.loc[61, "TemperatureMax_p90"] == pytest.approx(20.0)
+    # The second request is answered from disk
+    cache.get(39.4, -8.2, reference, fetch=lambda *args: pytest.fail("normals were downloaded again"))
+    assert climatology.day_of_year(["2021-03-01", "2020-02-29", "2020-12-31"]).tolist() == [61, 60, 366]
+
+    recent = pd.DataFrame({
+        "Date": pd.date_range("2024-07-01", periods=10).strftime("%Y-%m-%d"),
+        "TemperatureMax": [20, 25, 26, 24, 20, 20, 23, 20, 20, 20],
+        "TemperatureMin": [10.0] * 10,
+        "Precipitation": [0.0] * 10,
+    })
+    anomalies = climatology.compute_anomalies(recent, normals)
+    assert anomalies["TemperatureMax_anomaly"].tolist()[:3] == [0, 5, 6]
+    heatwaves = climatology.detect_percentile_events(recent, normals, percentile=90, min_duration=3)
+    assert len(heatwaves) == 1
+    assert heatwaves.iloc[0]["Length"] == 3
+    assert heatwaves.iloc[0]["PeakExcess"] == pytest.approx(6)
+    # Cold spells default to the 10th percentile of TemperatureMin
+    spread = normals.assign(TemperatureMin_p10=8.0, TemperatureMin_p90=12.0)
+    cold = recent.assign(TemperatureMin=[10, 7, 6, 7, 10, 10, 10, 10, 10, 10])
+    cold_spells = climatology.detect_percentile_events(cold, spread, heat=False)
+    assert cold_spells["Length"].tolist() == [3]
+    assert cold_spells.iloc[0]["PeakExcess"] == pytest.approx(-2)
+    report = climatology.departure_report(recent, normals)
+    assert report.iloc[0]["HotDays"] == 4
+    assert report.iloc[0]["Precipitation_normal"] == pytest.approx(10.0)
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
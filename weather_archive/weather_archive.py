@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Weather columns kept in the archive, in the order of its last axis
+ARCHIVE_VARIABLES = ['TemperatureMax', 'TemperatureMin', 'Precipitation']
+
+class WeatherArchive:
+    def __init__(self, path, mode="r"):
+        """
+        Open an archive of daily weather for many farms, stored as one memory-mapped
+        float32 array of shape farms x days x variables (values.npy) plus an index
+        (index.json) with the farm ids, the first date and the variable names.
+        Each farm's days are contiguous on disk, so reading some farms and dates only
+        loads the pages those rows live in.
+        """
+        self.path = Path(path)
+        index = json.loads((self.path / "index.json").read_text())
+        self.farm_ids = index["farm_ids"]
+        self.variables = index["variables"]
+        self.start_date = pd.Timestamp(index["start_date"])
+        self.values = np.load(self.path / "values.npy", mmap_mode=mode)
+        self.dates = pd.date_range(self.start_date, periods=self.values.shape[1], freq="D")
+        self.farm_rows = {farm_id: row for row, farm_id in enumerate(self.farm_ids)}
+
+    @classmethod
+    def create(cls, path, farm_ids, start_date, end_date, variables=ARCHIVE_VARIABLES):
+        """
+        Create an empty archive (all NaN) for the farms and dates, and open it for writing.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        num_days = len(pd.date_range(start_date, end_date, freq="D"))
+        values = np.lib.format.open_memmap(
+            path / "values.npy", mode="w+", dtype=np.float32, shape=(len(farm_ids), num_days, len(variables))
+        )
+        values[:] = np.nan
+        values.flush()
+        del values
+        (path / "index.json").write_text(json.dumps({
+            "farm_ids": [str(farm_id) for farm_id in farm_ids],
+            "variables": list(variables),
+            "start_date": pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+        }))
+        return cls(path, mode="r+")
+
+    @classmethod
+    def from_store(cls, path, store, farms, start_date, end_date):
+        """
+        Build an archive from a WeatherStore. `farms` is a list of dicts with
+        farm_id, latitude and longitude.
+        """
+        archive = cls.create(path, [farm["farm_id"] for farm in farms], start_date, end_date)
+        for farm in farms:
+            stored = store.read(farm["latitude"], farm["longitude"], start_date, end_date)
+            archive.write_farm(farm["farm_id"], stored)
+        archive.values.flush()
+        return archive
+
+    def _day_slice(self, start_date=None, end_date=None):
+        start = 0 if start_date is None else (pd.Timestamp(start_date) - self.start_date).days
+        end = len(self.dates) if end_date is None else (pd.Timestamp(end_date) - self.start_date).days + 1
+        return slice(max(start, 0), min(end, len(self.dates)))
+
+    def write_farm(self, farm_id, data):
+        """
+        Write a farm's daily rows (a DataFrame with Date and the archive variables).
+        """
+        row = self.farm_rows[str(farm_id)]
+        days = (pd.to_datetime(data['Date']) - self.start_date).dt.days.to_numpy()
+        inside = (days >= 0) & (days < len(self.dates))
+        self.values[row, days[inside], :] = data.loc[inside, self.variables].to_numpy(dtype=np.float32)
+
+    def array(self, variable, farm_ids=None, start_date=None, end_date=None):
+        """
+        Return a farms x days memory-mapped view of one variable, for the vectorized
+        analyses such as rolling_precipitation and detect_extreme_events.
+        Nothing is read from disk until the values are used.
+        """
+        days = self._day_slice(start_date, end_date)
+        variable_index = self.variables.index(variable)
+        if farm_ids is None:
+            return self.values[:, days, variable_index]
+        rows = [self.farm_rows[str(farm_id)] for farm_id in farm_ids]
+        if not rows:
+            return self.values[:0, days, variable_index]
+        # Consecutive farms stay a view; any other selection copies only those farms
+        if rows == list(range(rows[0], rows[0] + len(rows))):
+            return self.values[rows[0]:rows[0] + len(rows), days, variable_index]
+        return self.values[rows, days, variable_index]
+
+    def frame(self, farm_id, start_date=None, end_date=None):
+        """
+        Return one farm's rows as a weather DataFrame (Date, TemperatureMax, TemperatureMin,
+        Precipitation) that precipitation_data_avg and TemperatureAnalyzer can use directly.
+        Only the pages of that farm and date range are read.
+        """
+        days = self._day_slice(start_date, end_date)
+        farm_values = self.values[self.farm_rows[str(farm_id)], days, :]
+        data = {'Date': self.dates[days]}
+        for index, variable in enumerate(self.variables):
+            data[variable] = farm_values[:, index]
+        return pd.DataFrame(data)
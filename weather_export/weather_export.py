@@ -0,0 +1,96 @@
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Export formats and the file extension used for each
+EXPORT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+# Default compression for the binary formats. Use None for Feather files that
+# should be memory-mapped, since compressed buffers have to be decompressed into RAM.
+DEFAULT_COMPRESSION = "zstd"
+
+def export_frame(data, path, format="csv", compression=DEFAULT_COMPRESSION):
+    """
+    Write one DataFrame to `path` (the extension is added from the format).
+    Returns the path that was written.
+    """
+    path = Path(path).with_suffix(EXPORT_FORMATS[format])
+    if format == "csv":
+        data.to_csv(path, index=False, date_format='%Y-%m-%d')
+    elif format == "parquet":
+        data.to_parquet(path, index=False, compression=compression)
+    else:
+        data.reset_index(drop=True).to_feather(path, compression=compression or "uncompressed")
+    return path
+
+def _with_year(data):
+    return data.assign(Year=pd.to_datetime(data['Date']).dt.year)
+
+def export_partitioned(data, output_dir, format="parquet", compression=DEFAULT_COMPRESSION):
+    """
+    Write a weather DataFrame as a dataset partitioned by farm (when there is a
+    FarmId column) and year: <output_dir>/FarmId=<id>/Year=<year>/part-0.<ext>
+    """
+    partition_columns = (['FarmId'] if 'FarmId' in data.columns else []) + ['Year']
+    table = pa.Table.from_pandas(_with_year(data), preserve_index=False)
+    if format == "parquet":
+        file_format = ds.ParquetFileFormat()
+    elif format == "feather":
+        file_format = ds.IpcFileFormat()
+    else:
+        raise ValueError(f"Partitioned export supports parquet and feather, not {format}")
+    ds.write_dataset(
+        table,
+        output_dir,
+        format=file_format,
+        file_options=file_format.make_write_options(compression=compression),
+        partitioning=ds.partitioning(table.select(partition_columns).schema, flavor="hive"),
+        basename_template="part-{i}" + EXPORT_FORMATS[format],
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return Path(output_dir)
+
+class StreamingWriter:
+    def __init__(self, path, format="parquet", compression=DEFAULT_COMPRESSION):
+        """
+        Write a large export one chunk at a time, so the whole history never has to
+        be in memory. The file is created when the first chunk is written, and
+        every chunk must have the same columns.
+        """
+        if format not in ("parquet", "feather"):
+            raise ValueError(f"Streaming export supports parquet and feather, not {format}")
+        self.path = Path(path).with_suffix(EXPORT_FORMATS[format])
+        self.format = format
+        self.compression = compression
+        self.writer = None
+        self.sink = None
+        self.schema = None
+
+    def write(self, data):
+        """
+        Append one chunk (a DataFrame) to the file.
+        """
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            if self.format == "parquet":
+                self.writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+            else:
+                self.sink = pa.OSFile(str(self.path), "wb")
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+        self.writer.write_table(table.cast(self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
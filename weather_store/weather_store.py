@@ -0,0 +1,122 @@
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; msvcrt locks a byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+@contextmanager
+def partition_lock(path):
+    """
+    Hold an exclusive lock on <path>.lock for the duration of the block, so processes
+    writing the same partition take turns. The lock is released if a process dies.
+    """
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class WeatherStore:
+    def __init__(self, root=".weather_store", precision=2):
+        """
+        Initialize a local Parquet store of daily weather rows.
+        Files are partitioned by grid cell (coordinates rounded to `precision`
+        decimals) and by year: <root>/cell=<lat>_<lon>/<year>.parquet
+        Dates are stored as datetime64 and values keep the dtype they were written with.
+        """
+        self.root = Path(root)
+        self.precision = precision
+
+    def cell(self, latitude, longitude):
+        """
+        Return the grid cell key that a pair of coordinates falls in.
+        """
+        return f"{latitude:.{self.precision}f}_{longitude:.{self.precision}f}"
+
+    def cell_dir(self, latitude, longitude):
+        return self.root / f"cell={self.cell(latitude, longitude)}"
+
+    def years_between(self, start_date, end_date):
+        return range(pd.Timestamp(start_date).year, pd.Timestamp(end_date).year + 1)
+
+    def read(self, latitude, longitude, start_date, end_date, columns=None):
+        """
+        Read the stored rows for a cell between two dates (inclusive).
+        """
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        cell_dir = self.cell_dir(latitude, longitude)
+        frames = []
+        for year in self.years_between(start_date, end_date):
+            path = cell_dir / f"{year}.parquet"
+            if path.exists():
+                frames.append(pd.read_parquet(path, columns=columns))
+        if not frames:
+            return pd.DataFrame(columns=columns or ['Date', 'TemperatureMax', 'TemperatureMin', 'Precipitation'])
+        data = pd.concat(frames, ignore_index=True)
+        data = data[(data['Date'] >= start) & (data['Date'] <= end)]
+        return data.reset_index(drop=True)
+
+    def missing_ranges(self, latitude, longitude, start_date, end_date, refresh_after=None):
+        """
+        Return the (start, end) date ranges between two dates that are not stored yet.
+        Stored days on or after `refresh_after` count as missing, so recent days that
+        the API may still revise are downloaded again.
+        """
+        wanted = pd.date_range(start_date, end_date, freq='D')
+        stored = self.read(latitude, longitude, start_date, end_date, columns=['Date'])['Date']
+        missing = ~wanted.isin(stored)
+        if refresh_after is not None:
+            missing |= wanted >= pd.Timestamp(refresh_after)
+
+        # Group consecutive missing days into ranges
+        ranges = []
+        range_start = None
+        for day, is_missing in zip(wanted, missing):
+            if is_missing and range_start is None:
+                range_start = day
+            elif not is_missing and range_start is not None:
+                ranges.append((range_start.date(), (day - pd.Timedelta(days=1)).date()))
+                range_start = None
+        if range_start is not None:
+            ranges.append((range_start.date(), wanted[-1].date()))
+        return ranges
+
+    def write(self, latitude, longitude, data):
+        """
+        Merge daily rows into the store. Rows for a date that is already stored replace it.
+        """
+        if data.empty:
+            return
+        cell_dir = self.cell_dir(latitude, longitude)
+        cell_dir.mkdir(parents=True, exist_ok=True)
+        data = data.assign(Date=pd.to_datetime(data['Date']))
+        years = data['Date'].dt.year
+        for year, rows in data.groupby(years):
+            path = cell_dir / f"{year}.parquet"
+            # Other processes may be merging into the same partition, so the
+            # read-merge-write happens under the partition's lock
+            with partition_lock(path):
+                if path.exists():
+                    rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+                rows = rows.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+                # Write to a temporary file first so an interrupted run never leaves a broken partition
+                tmp_path = cell_dir / f"{year}.parquet.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+                rows.reset_index(drop=True).to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)